@@ -1,4 +1,5 @@
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -6,11 +7,33 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from i18n import compile_po, _locales_dir
 
 
-def build_po():
-    for po_file in _locales_dir.rglob("*.po"):
-        print(f"Compiling... {po_file}")
-        compile_po(po_file)
+def is_up_to_date(po_file: Path) -> bool:
+    mo_file = po_file.with_suffix(".mo")
+    try:
+        return mo_file.stat().st_mtime_ns >= po_file.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def build_po(force: bool = False):
+    po_files = list(_locales_dir.rglob("*.po"))
+
+    # .mo 가 .po 보다 최신이면 다시 컴파일하지 않음 (--force 로 전체 컴파일)
+    if not force:
+        po_files = [po_file for po_file in po_files if not is_up_to_date(po_file)]
+
+    # 파일이 하나뿐이면 프로세스 풀 생성 비용이 더 크므로 직접 컴파일
+    if len(po_files) <= 1:
+        for po_file in po_files:
+            compile_po(po_file)
+            print(f"Compiled {po_file}")
+        return
+
+    # 각 .po 파일은 독립적이므로 병렬로 컴파일, 출력은 메인 프로세스에서 순서대로
+    with ProcessPoolExecutor() as executor:
+        for po_file, _ in zip(po_files, executor.map(compile_po, po_files, chunksize=4)):
+            print(f"Compiled {po_file}")
 
 
 if __name__ == "__main__":
-    build_po()
+    build_po(force="--force" in sys.argv[1:])
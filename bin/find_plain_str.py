@@ -1,25 +1,34 @@
 import ast
+from concurrent.futures import ProcessPoolExecutor
+import os
+import pickle
 from pathlib import Path
 import re
 
 import pathspec
 
 
-re_zh_cn = re.compile("[\u4e00-\u9fff]")
+ZH_CN_FIRST = "\u4e00"
+ZH_CN_LAST = "\u9fff"
+# UTF-8 로 인코딩된 U+4000..U+9FFF 범위 (U+4E00..U+9FFF 포함)
+re_zh_cn_bytes = re.compile(rb"[\xe4-\xe9][\x80-\xbf][\x80-\xbf]")
+
+LOG_NAMES = frozenset(("logging", "logger", "log", "_log"))
+
+CACHE_PATH = Path(__file__).parent / ".strcache.pkl"
 
 
 class HardcodedStringFinder(ast.NodeVisitor):
     def __init__(self):
         self.results = []
-        self.context_stack = []
-        self.docstrings = set()
+        self.suppress_depth = 0
 
     def _mark_docstring(self, body):
         """바디의 첫 번째 문이 문자열이면 docstring으로 마킹"""
         if body and isinstance(body[0], ast.Expr):
             expr = body[0].value
-            if isinstance(expr, (ast.Constant, ast.Constant)):
-                self.docstrings.add(id(expr))
+            if isinstance(expr, ast.Constant):
+                expr._is_docstring = True
 
     def visit_Module(self, node):
         self._mark_docstring(node.body)
@@ -38,23 +47,29 @@ class HardcodedStringFinder(ast.NodeVisitor):
         self.generic_visit(node)
 
     def visit_Call(self, node):
+        func = node.func
+        func_type = type(func)
+
         # _() i18n 함수
-        if isinstance(node.func, ast.Name) and node.func.id == "_":
-            self.context_stack.append("i18n")
-            self.generic_visit(node)
-            self.context_stack.pop()
-            return
+        if func_type is ast.Name:
+            if func.id == "_":
+                self._visit_suppressed(node)
+                return
 
         # logging/logger
-        if isinstance(node.func, ast.Attribute):
-            if isinstance(node.func.value, ast.Name):
-                if node.func.value.id in ("logging", "logger", "log", "_log"):
-                    self.context_stack.append("logging")
-                    self.generic_visit(node)
-                    self.context_stack.pop()
-                    return
+        elif func_type is ast.Attribute:
+            value = func.value
+            if type(value) is ast.Name and value.id in LOG_NAMES:
+                self._visit_suppressed(node)
+                return
+
+        self.generic_visit(node)
 
+    def _visit_suppressed(self, node):
+        """i18n/logging 호출 내부의 문자열은 결과에서 제외"""
+        self.suppress_depth += 1
         self.generic_visit(node)
+        self.suppress_depth -= 1
 
     def visit_Str(self, node):
         self.visit_Constant(node)
@@ -66,13 +81,14 @@ class HardcodedStringFinder(ast.NodeVisitor):
         if not node.value.strip():
             return
 
-        if id(node) in self.docstrings:
+        if getattr(node, "_is_docstring", False):
             return
 
-        if "i18n" in self.context_stack or "logging" in self.context_stack:
+        if self.suppress_depth:
             return
 
-        if re_zh_cn.match(node.value) is None:
+        # 첫 글자가 중국어인 문자열만 대상
+        if not (ZH_CN_FIRST <= node.value[0] <= ZH_CN_LAST):
             return
 
         self.results.append(
@@ -81,13 +97,52 @@ class HardcodedStringFinder(ast.NodeVisitor):
 
 
 def find_hardcoded_strings(file_path: str):
-    code = Path(file_path).read_text(encoding="utf-8")
+    code = Path(file_path).read_bytes()
+
+    # 중국어가 한 글자도 없으면 파싱할 필요가 없음
+    if re_zh_cn_bytes.search(code) is None:
+        return []
+
     tree = ast.parse(code)
     finder = HardcodedStringFinder()
     finder.visit(tree)
     return finder.results
 
 
+def load_cache() -> dict:
+    """이전 실행 결과 캐시 로드 ((path, mtime, size) -> results)"""
+    try:
+        with open(CACHE_PATH, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return {}
+
+
+def save_cache(cache: dict):
+    with open(CACHE_PATH, "wb") as f:
+        pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def cache_key(file_path: str):
+    st = os.stat(file_path)
+    return (file_path, st.st_mtime_ns, st.st_size)
+
+
+def iter_py_files(root: str, spec, skip_dir: str, rel_prefix: str = ""):
+    """gitignore 에 걸린 디렉터리는 내려가지 않고 .py 파일 경로만 반환"""
+    with os.scandir(root) as it:
+        entries = sorted(it, key=lambda e: e.name)
+
+    for entry in entries:
+        rel_path = rel_prefix + entry.name
+        if entry.is_dir(follow_symlinks=False):
+            if entry.path == skip_dir or spec.match_file(rel_path + "/"):
+                continue
+            yield from iter_py_files(entry.path, spec, skip_dir, rel_path + "/")
+        elif entry.name.endswith(".py") and not spec.match_file(rel_path):
+            yield entry.path
+
+
 def main():
     local_dir = Path(__file__).parent
     root_dir = local_dir.parent
@@ -99,15 +154,31 @@ def main():
     else:
         spec = pathspec.PathSpec.from_lines("gitwildmatch", [])
 
-    for file_path in root_dir.rglob("*.py"):
-        if file_path.is_relative_to(local_dir):
-            continue
-
-        rel_path = file_path.relative_to(root_dir)
-        if spec.match_file(rel_path):
-            continue
-
-        results = find_hardcoded_strings(str(file_path))
+    file_paths = list(iter_py_files(str(root_dir), spec, str(local_dir)))
+
+    # 삭제/변경된 파일의 항목이 남지 않도록 이번 실행에서 본 파일만 새로 저장
+    old_cache = load_cache()
+    new_cache = {}
+
+    keys = {}
+    missed = []
+    for file_path in file_paths:
+        key = keys[file_path] = cache_key(file_path)
+        if key in old_cache:
+            new_cache[key] = old_cache[key]
+        else:
+            missed.append(file_path)
+
+    # 파일별 파싱은 서로 독립적인 CPU 작업이므로 프로세스 풀로 분산
+    if missed:
+        with ProcessPoolExecutor() as executor:
+            for file_path, results in zip(
+                missed, executor.map(find_hardcoded_strings, missed, chunksize=32)
+            ):
+                new_cache[keys[file_path]] = results
+
+    for file_path in file_paths:
+        results = new_cache[keys[file_path]]
         if results:
             lines = [
                 "=" * 50,
@@ -117,6 +188,8 @@ def main():
 
             print("\n".join(lines))
 
+    save_cache(new_cache)
+
 
 if __name__ == "__main__":
     main()
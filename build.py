@@ -26,6 +26,7 @@ def build():
         
         "--collect-all=dxcam",         # 收集 dxcam 所有文件
         "--noconfirm",                 # 覆盖已有输出
+        "--log-level=WARN",            # 只输出警告及错误，减少日志量
         "main.py"
     ]
     
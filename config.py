@@ -21,6 +21,10 @@ CHUNK_DURATION_SECONDS = 60  # 每60秒一个切片
 VIDEO_BITRATE = "500k"  # 低码率
 VIDEO_CODEC = "libx264"
 
+# 分析帧配置（请求中使用 detail: low，服务端会再缩小到约 512px，上传更大的帧只会浪费带宽）
+FRAME_WIDTH = int(os.getenv("DAYFLOW_FRAME_WIDTH", "768"))  # 高度按 16:9 计算
+FRAME_QUALITY = int(os.getenv("DAYFLOW_FRAME_QUALITY", "50"))  # JPEG 质量
+
 # 分析配置
 BATCH_DURATION_MINUTES = 15  # 批次时长约15分钟
 ANALYSIS_INTERVAL_SECONDS = 60  # 每分钟扫描一次
@@ -5,50 +5,61 @@ Dayflow - 开机自启动管理
 import sys
 import logging
 from pathlib import Path
+from typing import Optional
 
 from i18n import _
 
+if sys.platform == "win32":
+    import winreg
+
 logger = logging.getLogger(__name__)
 
 # Windows 注册表路径
 REG_PATH = r"Software\Microsoft\Windows\CurrentVersion\Run"
 APP_NAME = "Dayflow"
 
+# 运行期间不会改变，导入时计算一次
+IS_FROZEN = bool(getattr(sys, 'frozen', False))
+# 打包后为 EXE 路径；开发模式下为 python 解释器路径（不应用于自启动）
+_EXE_PATH = sys.executable
+
 
 def is_frozen() -> bool:
     """检测是否为打包后的 EXE 运行"""
-    return getattr(sys, 'frozen', False)
+    return IS_FROZEN
 
 
 def get_exe_path() -> str:
     """获取当前可执行文件的完整路径"""
-    if is_frozen():
-        return sys.executable
-    else:
-        # 开发模式下返回 python 解释器路径（不应用于自启动）
-        return sys.executable
+    return _EXE_PATH
+
+
+def _read_startup_command() -> Optional[str]:
+    """读取注册表中的启动命令，未注册时返回 None"""
+    with winreg.OpenKey(
+        winreg.HKEY_CURRENT_USER, 
+        REG_PATH, 
+        0, 
+        winreg.KEY_READ
+    ) as key:
+        try:
+            return winreg.QueryValueEx(key, APP_NAME)[0]
+        except FileNotFoundError:
+            return None
+
+
+def _parse_startup_path(command: str) -> str:
+    """从启动命令中提取 EXE 路径（移除引号和参数）"""
+    return command.strip('"').split('" ')[0].strip('"')
 
 
 def is_autostart_enabled() -> bool:
     """检测是否已启用开机自启动"""
-    if not is_frozen():
+    if not IS_FROZEN:
         return False
     
     try:
-        import winreg
-        key = winreg.OpenKey(
-            winreg.HKEY_CURRENT_USER, 
-            REG_PATH, 
-            0, 
-            winreg.KEY_READ
-        )
-        try:
-            value, _ = winreg.QueryValueEx(key, APP_NAME)
-            winreg.CloseKey(key)
-            return True
-        except FileNotFoundError:
-            winreg.CloseKey(key)
-            return False
+        return _read_startup_command() is not None
     except Exception as e:
         logger.warning(f"检测自启动状态失败: {e}")
         return False
@@ -57,24 +68,12 @@ def is_autostart_enabled() -> bool:
 def get_registered_path() -> str:
     """获取注册表中记录的启动路径"""
     try:
-        import winreg
-        key = winreg.OpenKey(
-            winreg.HKEY_CURRENT_USER, 
-            REG_PATH, 
-            0, 
-            winreg.KEY_READ
-        )
-        try:
-            value, _ = winreg.QueryValueEx(key, APP_NAME)
-            winreg.CloseKey(key)
-            # 移除引号
-            return value.strip('"').split('" ')[0].strip('"')
-        except FileNotFoundError:
-            winreg.CloseKey(key)
-            return ""
+        command = _read_startup_command()
     except Exception as e:
         logger.warning(f"获取注册路径失败: {e}")
         return ""
+    
+    return _parse_startup_path(command) if command else ""
 
 
 def enable_autostart() -> tuple:
@@ -84,24 +83,22 @@ def enable_autostart() -> tuple:
     Returns:
         (success: bool, message: str)
     """
-    if not is_frozen():
+    if not IS_FROZEN:
         return False, _("开发模式下无法启用自启动，请使用打包后的 EXE")
     
     try:
-        import winreg
-        exe_path = get_exe_path()
+        exe_path = _EXE_PATH
         
         # 添加 --minimized 参数，启动时直接最小化到托盘
         startup_command = f'"{exe_path}" --minimized'
         
-        key = winreg.OpenKey(
+        with winreg.OpenKey(
             winreg.HKEY_CURRENT_USER, 
             REG_PATH, 
             0, 
             winreg.KEY_SET_VALUE
-        )
-        winreg.SetValueEx(key, APP_NAME, 0, winreg.REG_SZ, startup_command)
-        winreg.CloseKey(key)
+        ) as key:
+            winreg.SetValueEx(key, APP_NAME, 0, winreg.REG_SZ, startup_command)
         
         logger.info(f"已启用开机自启动: {startup_command}")
         return True, _("开机自启动已启用")
@@ -122,20 +119,18 @@ def disable_autostart() -> tuple:
         (success: bool, message: str)
     """
     try:
-        import winreg
-        key = winreg.OpenKey(
+        with winreg.OpenKey(
             winreg.HKEY_CURRENT_USER, 
             REG_PATH, 
             0, 
             winreg.KEY_SET_VALUE
-        )
-        try:
-            winreg.DeleteValue(key, APP_NAME)
-            logger.info("已禁用开机自启动")
-        except FileNotFoundError:
-            # 本来就没有，不算错误
-            pass
-        winreg.CloseKey(key)
+        ) as key:
+            try:
+                winreg.DeleteValue(key, APP_NAME)
+                logger.info("已禁用开机自启动")
+            except FileNotFoundError:
+                # 本来就没有，不算错误
+                pass
         return True, _("开机自启动已禁用")
         
     except PermissionError:
@@ -153,14 +148,21 @@ def check_path_changed() -> tuple:
     Returns:
         (changed: bool, old_path: str, new_path: str)
     """
-    if not is_frozen():
+    if not IS_FROZEN:
         return False, "", ""
     
-    if not is_autostart_enabled():
+    # 只打开一次注册表：未注册即视为未启用
+    try:
+        command = _read_startup_command()
+    except Exception as e:
+        logger.warning(f"检测自启动状态失败: {e}")
+        return False, "", ""
+    
+    if command is None:
         return False, "", ""
     
-    registered_path = get_registered_path()
-    current_path = get_exe_path()
+    registered_path = _parse_startup_path(command)
+    current_path = _EXE_PATH
     
     if registered_path and registered_path != current_path:
         return True, registered_path, current_path
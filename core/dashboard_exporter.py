@@ -3,13 +3,15 @@ Dayflow - 仪表盘导出器
 生成 HTML 格式的生产力报告
 """
 import logging
+import os
 import webbrowser
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime, date
 from pathlib import Path
 from typing import Optional, List, Dict
 
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
 
 import config
 from database.storage import StorageManager
@@ -44,12 +46,12 @@ class DashboardData:
     # 活动列表
     activities: List[Dict]
     categories: List[str]
-    category_colors: Dict[str, str]
     
     # AI 洞察
     ai_insights: Optional[str]
 
 
+@lru_cache(maxsize=4096)
 def format_duration(minutes: int) -> str:
     """
     将分钟数格式化为可读字符串
@@ -63,42 +65,65 @@ def format_duration(minutes: int) -> str:
     if minutes < 1:
         return "0m"
     
-    hours = minutes // 60
-    mins = minutes % 60
-    
-    if hours > 0 and mins > 0:
-        return f"{hours}h {mins}m"
-    elif hours > 0:
-        return f"{hours}h"
-    else:
+    hours, mins = divmod(minutes, 60)
+    if not hours:
         return f"{mins}m"
+    
+    return f"{hours}h {mins}m" if mins else f"{hours}h"
+
+
+@lru_cache(maxsize=1)
+def _get_environment(template_dir: Path) -> Environment:
+    """获取共享的 Jinja 环境，使已解析的模板在多个导出器之间复用"""
+    # 模板编译结果缓存到磁盘，冷启动时跳过解析/编译
+    cache_dir = config.APP_DATA_DIR / "template_cache"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    env = Environment(
+        loader=FileSystemLoader(template_dir),
+        auto_reload=False,  # 模板运行期间不会变化，无需每次 stat 检查
+        cache_size=50,
+        bytecode_cache=FileSystemBytecodeCache(str(cache_dir)),
+    )
+    
+    # 添加自定义过滤器
+    env.filters['format_duration'] = format_duration
+    
+    # 常量只注册一次，无需每次导出都放入渲染数据
+    env.globals['CATEGORY_COLORS'] = CATEGORY_COLORS
+    return env
 
 
 class DashboardExporter:
     """仪表盘导出器"""
     
+    # 进程内缓存：模板目录只探测一次
+    _template_dir: Optional[Path] = None
+    
     def __init__(self, storage: StorageManager):
         self.storage = storage
         self.stats = StatsCollector(storage)
         
         # 模板目录 - 支持打包后的路径
         self.template_dir = self._get_template_dir()
-        self.env = Environment(loader=FileSystemLoader(self.template_dir))
-        
-        # 添加自定义过滤器
-        self.env.filters['format_duration'] = format_duration
+        self.env = _get_environment(self.template_dir)
     
     def _get_template_dir(self) -> Path:
         """获取模板目录路径"""
+        if DashboardExporter._template_dir is not None:
+            return DashboardExporter._template_dir
+        
         # 优先使用打包后的路径
         if hasattr(config, 'APP_DIR'):
             packed_path = config.APP_DIR / "templates"
             if packed_path.exists():
+                DashboardExporter._template_dir = packed_path
                 return packed_path
         
         # 开发环境路径
         dev_path = Path(__file__).parent.parent / "templates"
         if dev_path.exists():
+            DashboardExporter._template_dir = dev_path
             return dev_path
         
         raise FileNotFoundError(_("模板目录不存在"))
@@ -130,9 +155,6 @@ class DashboardExporter:
         # 收集数据
         data = self._collect_data(start_date, end_date)
         
-        # 渲染模板
-        html_content = self._render_template(data)
-        
         # 生成文件名
         if start_date == end_date:
             filename = f"dayflow_report_{start_date}.html"
@@ -141,9 +163,8 @@ class DashboardExporter:
         
         output_path = output_dir / filename
         
-        # 保存文件
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        # 渲染模板并保存文件
+        self._render_template(data, output_path)
         
         logger.info(f"仪表盘已导出: {output_path}")
         return output_path
@@ -172,29 +193,27 @@ class DashboardExporter:
 
     def _collect_data(self, start_date: date, end_date: date) -> DashboardData:
         """收集指定日期范围的数据"""
-        # 基础统计
-        total_duration = self.stats.get_total_duration(start_date, end_date)
-        avg_productivity = self.stats.get_avg_productivity(start_date, end_date)
-        deep_work = self.stats.get_deep_work_duration(start_date, end_date)
-        activity_count = self.stats.get_activity_count(start_date, end_date)
-        
-        # 图表数据
-        category_distribution = self.stats.get_category_distribution(start_date, end_date)
-        
+        # 一次加载并汇总全部统计数据
         # 每小时效率 - 如果是单日则使用该日，否则使用最后一天
-        hourly_efficiency = self.stats.get_hourly_efficiency(end_date)
+        stats = self.stats.aggregate_all(start_date, end_date, top_apps_limit=5)
         
-        # 周趋势
-        weekly_trend = self.stats.get_weekly_trend(end_date)
+        # 基础统计
+        total_duration = stats.total_duration
+        avg_productivity = stats.avg_productivity
+        deep_work = stats.deep_work_duration
+        activity_count = stats.activity_count
         
-        # 应用排行
-        top_applications = self.stats.get_top_applications(start_date, end_date, limit=5)
+        # 图表数据
+        category_distribution = stats.category_distribution
+        hourly_efficiency = stats.hourly_efficiency
+        weekly_trend = stats.weekly_trend
+        top_applications = stats.top_applications
         
         # 活动列表
-        activities = self.stats.get_activities(start_date, end_date)
+        activities = stats.activities
         
-        # 提取所有分类
-        categories = list(set(a['category'] for a in activities))
+        # 提取所有分类（单次遍历去重，并保持首次出现的顺序）
+        categories = list(dict.fromkeys(a['category'] for a in activities))
         
         # 日期范围文本
         if start_date == end_date:
@@ -218,12 +237,16 @@ class DashboardExporter:
             top_applications=top_applications,
             activities=activities,
             categories=categories,
-            category_colors=CATEGORY_COLORS,
             ai_insights=None  # AI 洞察暂不实现
         )
     
-    def _render_template(self, data: DashboardData) -> str:
-        """渲染 HTML 模板"""
+    def _render_template(self, data: DashboardData, output_path: Path):
+        """
+        渲染 HTML 模板并分块写入文件（不在内存中拼接完整 HTML）
+        
+        先写入同目录下的临时文件，渲染成功后再替换目标文件，
+        渲染出错时不会留下不完整的报告。
+        """
         template_path = (
             "dashboard.html"
             if get_current_language() == config.DEFAULT_LANGUAGE
@@ -231,4 +254,10 @@ class DashboardExporter:
         )
         
         template = self.env.get_template(template_path)
-        return template.render(data=data)
+        temp_path = output_path.with_name(output_path.name + ".tmp")
+        try:
+            template.stream(data=data).dump(str(temp_path), encoding="utf-8")
+            os.replace(temp_path, output_path)
+        except Exception:
+            temp_path.unlink(missing_ok=True)
+            raise
@@ -3,16 +3,21 @@ Dayflow Windows - API 交互层
 使用 OpenAI 兼容格式调用心流 API
 """
 import asyncio
+import atexit
 import base64
 import json
 import logging
-import re
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from datetime import datetime
 
 import httpx
 import cv2
+import numpy as np
 
 import config
 from core.types import Observation, ActivityCard, AppSite, Distraction
@@ -20,6 +25,215 @@ from i18n import _
 
 logger = logging.getLogger(__name__)
 
+# 可选：TurboJPEG 直接从 numpy 缓冲区编码，比 cv2.imencode 更快
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420
+    _TJ = TurboJPEG()
+except Exception:
+    _TJ = None
+
+# 可选：PyAV 可以只解码关键帧，避免逐个 seek 时重复解码整个 GOP
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+
+# 可选：orjson 序列化包含多张 base64 图片的请求体比标准库 json 快得多
+try:
+    import orjson
+    
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+    
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    
+    _json_loads = json.loads
+
+JPEG_QUALITY = config.FRAME_QUALITY
+FRAME_SIZE = (config.FRAME_WIDTH, config.FRAME_WIDTH * 9 // 16)
+
+# 感知哈希汉明距离小于该值的帧视为重复画面
+PHASH_DUPLICATE_THRESHOLD = 10
+
+# 缩放/JPEG 编码在 OpenCV、libjpeg-turbo 中执行时会释放 GIL，可多核并行；线程池在首次提取帧时才创建
+_encode_executor: Optional[ThreadPoolExecutor] = None
+_encode_lock = threading.Lock()
+# 每个编码线程复用自己的缩放输出缓冲区
+_encode_buffers = threading.local()
+
+
+def _get_encode_executor() -> ThreadPoolExecutor:
+    """获取（必要时创建）帧编码线程池"""
+    global _encode_executor
+    with _encode_lock:
+        if _encode_executor is None:
+            # 帧提取在线程中并发执行，避免 OpenCV 内部线程池与之争用 CPU
+            cv2.setNumThreads(1)
+            _encode_executor = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="frame-encode")
+        return _encode_executor
+
+
+def _encode_jpeg(frame):
+    """将 BGR 帧编码为 JPEG，返回支持缓冲区协议的对象（bytes 或 numpy 数组）"""
+    if _TJ is not None:
+        return _TJ.encode(frame, quality=JPEG_QUALITY, pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_420)
+    
+    # libjpeg 默认即 4:2:0 色度抽样，这里额外开启霍夫曼表优化
+    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY, cv2.IMWRITE_JPEG_OPTIMIZE, 1])
+    return buffer
+
+
+def _phash(frame) -> np.ndarray:
+    """计算帧的 64 位感知哈希（DCT 低频分量与中位数比较），返回 8 字节 uint8 数组"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8]
+    return np.packbits(low > np.median(low))
+
+
+def _select_distinct_frames(candidates, max_frames: int) -> list:
+    """
+    从候选帧中挑选画面互不重复的帧
+    
+    Args:
+        candidates: 按优先级产出 (时间, 帧) 的可迭代对象，先均匀采样点、后补充采样点
+        max_frames: 最大帧数
+        
+    Returns:
+        按时间排序的 (时间, 帧) 列表，时间为视频内的秒数
+    """
+    kept = []
+    for seconds, frame in candidates:
+        frame_hash = _phash(frame)
+        if all(np.unpackbits(frame_hash ^ h).sum() >= PHASH_DUPLICATE_THRESHOLD for _, _, h in kept):
+            kept.append((seconds, frame, frame_hash))
+            if len(kept) >= max_frames:
+                break
+    
+    kept.sort(key=lambda item: item[0])
+    return [(seconds, frame) for seconds, frame, _ in kept]
+
+
+def _iter_frames_cv2(cap, total_frames: int, max_frames: int):
+    """按优先级逐个 seek 读取候选帧：先是均匀采样点，再是相邻采样点之间的中点（仅在需要补充时才会读取）"""
+    fps = cap.get(cv2.CAP_PROP_FPS) or config.RECORD_FPS
+    seen = set()
+    for offset in (0.0, 0.5):
+        for i in range(max_frames):
+            idx = int((i + offset) * total_frames / max_frames)
+            if idx in seen:
+                continue
+            seen.add(idx)
+            
+            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+            ret, frame = cap.read()
+            if ret:
+                yield idx / fps, frame
+
+
+def _extract_json_block(text: str) -> Optional[str]:
+    """截取文本中第一个 '{' 到最后一个 '}' 之间的 JSON 片段（线性扫描，无正则回溯）"""
+    start, end = text.find('{'), text.rfind('}')
+    if start != -1 and end > start:
+        return text[start:end + 1]
+    return None
+
+
+def _read_keyframes_av(video_path: str, max_frames: int):
+    """
+    使用 PyAV 只解码关键帧，按优先级产出候选帧：先是最接近各均匀时间点的关键帧，再是其余关键帧
+    
+    先只解复用（不解码）统计关键帧，数量不足时不做任何解码；解码在取到所需的帧后即停止，
+    其余关键帧只在去重后仍需补充时才会解码。
+    
+    Returns:
+        产出 (时间, BGR 帧) 的迭代器；PyAV 不可用、读取失败或关键帧数量不足时返回 None（回退到 OpenCV）
+    """
+    if not AV_AVAILABLE:
+        return None
+    
+    try:
+        with av.open(video_path) as container:
+            stream = container.streams.video[0]
+            time_base = stream.time_base
+            # 解复用只读取数据包，不解码
+            keyframe_pts = sorted(
+                packet.pts for packet in container.demux(stream)
+                if packet.is_keyframe and packet.pts is not None
+            )
+            duration = float(stream.duration * time_base) if stream.duration is not None else None
+    except Exception as e:
+        logger.debug(f"PyAV 读取失败，回退到 OpenCV: {e}")
+        return None
+    
+    if len(keyframe_pts) < max_frames:
+        return None
+    
+    times = [float(pts * time_base) for pts in keyframe_pts]
+    if duration is None:
+        duration = times[-1]
+    
+    selected = []
+    last_idx = -1
+    for i in range(max_frames):
+        # 与 OpenCV 路径相同的均匀采样时间点
+        target = i * duration / max_frames
+        idx = bisect_left(times, target)
+        if idx > 0 and (idx == len(times) or target - times[idx - 1] <= times[idx] - target):
+            idx -= 1
+        # 保证帧不重复，并为剩余的时间点留出足够的关键帧
+        idx = min(max(idx, last_idx + 1), len(times) - (max_frames - i))
+        selected.append(idx)
+        last_idx = idx
+    
+    chosen = set(selected)
+    rest = [i for i in range(len(keyframe_pts)) if i not in chosen]
+    return _iter_keyframes_av(
+        video_path,
+        [(keyframe_pts[i], times[i]) for i in selected],
+        [(keyframe_pts[i], times[i]) for i in rest],
+    )
+
+
+def _iter_keyframes_av(video_path: str, wanted: list, rest: list):
+    """按 (pts, 时间) 列表解码关键帧：先产出 wanted 中的帧，被继续迭代时再逐帧解码 rest 中的帧"""
+    try:
+        with av.open(video_path) as container:
+            stream = container.streams.video[0]
+            stream.codec_context.skip_frame = "NONKEY"
+            
+            # 按时间顺序解码，越过最后一个目标关键帧即停止
+            wanted_pts = dict(wanted)
+            last_pts = max(wanted_pts)
+            frames = {}
+            for frame in container.decode(stream):
+                if frame.pts in wanted_pts:
+                    frames[frame.pts] = frame.to_ndarray(format="bgr24")
+                if frame.pts is not None and frame.pts >= last_pts:
+                    break
+            for pts, seconds in wanted:
+                if pts in frames:
+                    yield seconds, frames.pop(pts)
+            
+            # 去重后仍需补充时才会迭代到这里：从头逐帧解码其余关键帧，取够后由调用方停止迭代
+            rest_pts = dict(rest)
+            if rest_pts:
+                container.seek(0)
+                for frame in container.decode(stream):
+                    seconds = rest_pts.get(frame.pts)
+                    if seconds is not None:
+                        yield seconds, frame.to_ndarray(format="bgr24")
+    except Exception as e:
+        logger.debug(f"PyAV 关键帧解码失败: {e}")
+
+# 提示词中逐行拼接的行模板（预先绑定 str.format，避免每行重新解析 f-string）
+_WINDOW_LINE = "- [{start:.0f}s - {end:.0f}s] {app}{title}\n".format
+_OBS_LINE = "- [{start:.0f}s - {end:.0f}s] {text}{app}\n".format
+
 # 系统提示词
 TRANSCRIBE_SYSTEM_PROMPT = """你是屏幕活动分析助手。根据截图和窗口信息，描述用户的具体行为。
 
@@ -114,7 +328,9 @@ class DayflowBackendProvider:
         if self._client is None or self._client.is_closed:
             self._client = httpx.AsyncClient(
                 timeout=httpx.Timeout(self.timeout),
-                headers=self.headers
+                headers=self.headers,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+                http2=True
             )
         return self._client
     
@@ -124,46 +340,60 @@ class DayflowBackendProvider:
             await self._client.aclose()
             self._client = None
     
-    def _extract_frames_from_video(self, video_path: str, max_frames: int = 10) -> List[str]:
+    def _extract_frames_from_video(self, video_path: str, max_frames: int = 10) -> List[Tuple[float, str]]:
         """
-        从视频中提取关键帧并编码为 base64
+        从视频中提取关键帧并编码为 base64 data URL
         
         Args:
             video_path: 视频文件路径
             max_frames: 最大提取帧数
             
         Returns:
-            List[str]: base64 编码的图片列表
+            List[Tuple[float, str]]: 按时间排序的 (帧在视频中的秒数, data:image/jpeg;base64 图片 URL) 列表
         """
-        frames_base64 = []
+        executor = _get_encode_executor()
+        
+        # 丢弃与已选帧画面几乎相同的帧（感知哈希），不足时用补充采样点替代
+        keyframes = _read_keyframes_av(video_path, max_frames)
+        if keyframes is not None:
+            frames = _select_distinct_frames(keyframes, max_frames)
+            if frames:
+                return self._encode_frames(executor, frames)
         
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             logger.error(f"无法打开视频文件: {video_path}")
-            return frames_base64
+            return []
         
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        if total_frames == 0:
+        try:
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            if total_frames == 0:
+                return []
+            
+            frames = _select_distinct_frames(_iter_frames_cv2(cap, total_frames, max_frames), max_frames)
+        finally:
             cap.release()
-            return frames_base64
-        
-        # 均匀采样帧
-        frame_indices = [int(i * total_frames / max_frames) for i in range(max_frames)]
         
-        for idx in frame_indices:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-            ret, frame = cap.read()
-            if not ret:
-                continue
-            
-            # 压缩图片以减少传输大小
-            frame = cv2.resize(frame, (1280, 720))
-            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-            base64_image = base64.b64encode(buffer).decode('utf-8')
-            frames_base64.append(base64_image)
-        
-        cap.release()
-        return frames_base64
+        # VideoCapture 不是线程安全的，读取保持顺序，编码并行
+        return self._encode_frames(executor, frames)
+    
+    def _encode_frames(self, executor: ThreadPoolExecutor, frames: List[tuple]) -> List[Tuple[float, str]]:
+        """并行编码 (时间, 帧) 列表，保留每帧的时间"""
+        urls = executor.map(self._encode_frame, [frame for _, frame in frames])
+        return [(seconds, url) for (seconds, _), url in zip(frames, urls)]
+    
+    def _encode_frame(self, frame) -> str:
+        """缩放并编码单帧为 JPEG data URL（在编码线程池中执行）"""
+        # 压缩图片以减少传输大小，已不超过目标尺寸时直接编码
+        h, w = frame.shape[:2]
+        if w > FRAME_SIZE[0] or h > FRAME_SIZE[1]:
+            dst = getattr(_encode_buffers, "dst", None)
+            if dst is None:
+                dst = _encode_buffers.dst = np.empty((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+            frame = cv2.resize(frame, FRAME_SIZE, dst=dst, interpolation=cv2.INTER_AREA)
+        buffer = _encode_jpeg(frame)
+        # 直接对编码缓冲区做 base64，并在 bytes 层面拼接前缀，只解码一次
+        return (b"data:image/jpeg;base64," + base64.b64encode(memoryview(buffer))).decode('ascii')
     
     async def _chat_completion(
         self,
@@ -192,11 +422,11 @@ class DayflowBackendProvider:
         try:
             response = await client.post(
                 f"{self.api_base_url}/chat/completions",
-                json=request_body
+                content=_json_dumps(request_body)
             )
             response.raise_for_status()
             
-            result = response.json()
+            result = _json_loads(response.content)
             return result["choices"][0]["message"]["content"]
             
         except httpx.HTTPStatusError as e:
@@ -229,8 +459,8 @@ class DayflowBackendProvider:
         if not video_file.exists():
             raise FileNotFoundError(_("视频文件不存在: {video_path}").format(video_path=video_path))
         
-        # 提取视频帧
-        frames = self._extract_frames_from_video(video_path, max_frames=8)
+        # 提取视频帧（解码/编码较耗时，放到线程中执行以免阻塞事件循环）
+        frames = await asyncio.to_thread(self._extract_frames_from_video, video_path, 8)
         if not frames:
             logger.warning(f"无法从视频提取帧: {video_path}")
             return []
@@ -238,7 +468,7 @@ class DayflowBackendProvider:
         # 构建窗口信息文本（包含窗口标题）
         window_info_text = ""
         if window_records:
-            window_info_text = _("\n\n窗口信息：\n")
+            window_lines = [_("\n\n窗口信息：\n")]
             # 按时间段聚合相同的应用
             current_app = None
             current_title = None
@@ -249,14 +479,20 @@ class DayflowBackendProvider:
                 if app_name != current_app or window_title != current_title:
                     if current_app:
                         title_part = f": {current_title}" if current_title else ""
-                        window_info_text += f"- [{current_start:.0f}s - {record['timestamp']:.0f}s] {current_app}{title_part}\n"
+                        window_lines.append(_WINDOW_LINE(start=current_start, end=record['timestamp'], app=current_app, title=title_part))
                     current_app = app_name
                     current_title = window_title
                     current_start = record.get("timestamp", 0)
             # 添加最后一个
             if current_app:
                 title_part = f": {current_title}" if current_title else ""
-                window_info_text += f"- [{current_start:.0f}s - {duration:.0f}s] {current_app}{title_part}\n"
+                window_lines.append(_WINDOW_LINE(start=current_start, end=duration, app=current_app, title=title_part))
+            window_info_text = "".join(window_lines)
+        
+        # 去重后的帧间隔不再均匀，逐帧给出时间，便于模型确定 start_ts/end_ts
+        frame_times_text = _("\n\n各关键帧的时间（与图片顺序一致）：{times}").format(
+            times=", ".join(f"{seconds:.0f}s" for seconds, _url in frames)
+        )
         
         # 构建消息内容（包含多张图片）
         content = []
@@ -265,16 +501,16 @@ class DayflowBackendProvider:
             "text": _("以下是一段 {duration:.0f} 秒屏幕录制的 {frames} 个关键帧，请分析用户的活动。{window_info_text}{prompt}").format(
                 duration=duration,
                 frames=len(frames),
-                window_info_text=window_info_text,
+                window_info_text=frame_times_text + window_info_text,
                 prompt=prompt or '',
             )
         })
         
-        for i, frame_base64 in enumerate(frames):
+        for _seconds, frame_url in frames:
             content.append({
                 "type": "image_url",
                 "image_url": {
-                    "url": f"data:image/jpeg;base64,{frame_base64}",
+                    "url": frame_url,
                     "detail": "low"
                 }
             })
@@ -330,9 +566,12 @@ class DayflowBackendProvider:
                 current_title = window_title
                 current_start = timestamp
         
-        # 添加最后一个时间段
+        # 添加最后一个时间段（结束时间不早于开始时间，保证 seg_ends 有序）
         if current_app:
-            time_segments.append((current_start, duration, current_app, current_title))
+            time_segments.append((current_start, max(duration, current_start), current_app, current_title))
+        
+        # 窗口记录按时间顺序采样，时间段首尾相接，结束时间单调递增
+        seg_ends = [seg[1] for seg in time_segments]
         
         # 为每个 observation 找到对应的应用
         for obs in observations:
@@ -343,7 +582,12 @@ class DayflowBackendProvider:
             app_durations: Dict[str, float] = {}
             app_titles: Dict[str, str] = {}
             
-            for seg_start, seg_end, app_name, window_title in time_segments:
+            # 二分定位第一个结束于 obs_start 之后的时间段，越过 obs_end 即停止
+            for k in range(bisect_right(seg_ends, obs_start), len(time_segments)):
+                seg_start, seg_end, app_name, window_title = time_segments[k]
+                if seg_start >= obs_end:
+                    break
+                
                 # 计算重叠时间
                 overlap_start = max(obs_start, seg_start)
                 overlap_end = min(obs_end, seg_end)
@@ -386,25 +630,26 @@ class DayflowBackendProvider:
             return []
         
         # 构建观察记录文本
-        obs_text = f"{_("观察记录：")}\n"
+        obs_parts = [f"{_("观察记录：")}\n"]
+        app_label = _("应用:")
         for obs in observations:
-            obs_text += f"- [{obs.start_ts:.0f}s - {obs.end_ts:.0f}s] {obs.text}"
-            if obs.app_name:
-                obs_text += f" ({_("应用:")} {obs.app_name})"
-            obs_text += "\n"
+            app_part = f" ({app_label} {obs.app_name})" if obs.app_name else ""
+            obs_parts.append(_OBS_LINE(start=obs.start_ts, end=obs.end_ts, text=obs.text, app=app_part))
         
         # 添加时间上下文
         if start_time:
-            obs_text += f"\n{_("录制开始时间:")} {start_time.isoformat()}"
+            obs_parts.append(f"\n{_("录制开始时间:")} {start_time.isoformat()}")
         
         # 添加前序卡片上下文
         if context_cards:
-            obs_text += f"\n\n{_("前序活动卡片：")}\n"
+            obs_parts.append(f"\n\n{_("前序活动卡片：")}\n")
             for card in context_cards[-3:]:  # 只取最近3个
-                obs_text += f"- {card.category}: {card.title}\n"
+                obs_parts.append(f"- {card.category}: {card.title}\n")
         
         if prompt:
-            obs_text += f"\n{prompt}"
+            obs_parts.append(f"\n{prompt}")
+        
+        obs_text = "".join(obs_parts)
         
         messages = [
             {"role": "system", "content": _(GENERATE_CARDS_SYSTEM_PROMPT)},
@@ -424,9 +669,9 @@ class DayflowBackendProvider:
         
         try:
             # 尝试提取 JSON
-            json_match = re.search(r'\{[\s\S]*\}', text)
-            if json_match:
-                data = json.loads(json_match.group())
+            json_block = _extract_json_block(text)
+            if json_block:
+                data = _json_loads(json_block)
                 items = data.get("observations", [])
                 
                 for item in items:
@@ -454,9 +699,9 @@ class DayflowBackendProvider:
         cards = []
         
         try:
-            json_match = re.search(r'\{[\s\S]*\}', text)
-            if json_match:
-                data = json.loads(json_match.group())
+            json_block = _extract_json_block(text)
+            if json_block:
+                data = _json_loads(json_block)
                 items = data.get("cards", [])
                 
                 for item in items:
@@ -547,13 +792,58 @@ class DayflowBackendProvider:
 
 
 # 便捷函数：同步调用
+# httpx.AsyncClient 绑定在创建它的事件循环上，所以同步调用统一在一个后台事件循环中执行，
+# 并按参数缓存 Provider，使多次调用复用同一个连接池（避免每次重新 TCP/TLS 握手）
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_providers: Dict[tuple, DayflowBackendProvider] = {}
+_sync_lock = threading.Lock()
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    """获取（必要时启动）同步调用专用的后台事件循环"""
+    global _sync_loop
+    with _sync_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="llm-sync-loop", daemon=True).start()
+            atexit.register(_close_sync_providers)
+        return _sync_loop
+
+
+def _get_sync_provider(**kwargs) -> DayflowBackendProvider:
+    """按构造参数获取缓存的 Provider"""
+    key = tuple(sorted(kwargs.items()))
+    with _sync_lock:
+        provider = _sync_providers.get(key)
+        if provider is None:
+            provider = _sync_providers[key] = DayflowBackendProvider(**kwargs)
+        return provider
+
+
+def _run_sync(coro):
+    """在后台事件循环中执行协程并等待结果"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_sync_loop()).result()
+
+
+def _close_sync_providers():
+    """进程退出时关闭缓存的 HTTP 客户端"""
+    loop = _sync_loop
+    if loop is None:
+        return
+    
+    for provider in list(_sync_providers.values()):
+        try:
+            asyncio.run_coroutine_threadsafe(provider.close(), loop).result(timeout=5)
+        except Exception as e:
+            logger.debug(f"关闭 HTTP 客户端失败: {e}")
+    _sync_providers.clear()
+    loop.call_soon_threadsafe(loop.stop)
+
+
 def transcribe_video_sync(video_path: str, duration: float, **kwargs) -> List[Observation]:
     """同步版本的视频分析"""
-    provider = DayflowBackendProvider(**kwargs)
-    try:
-        return asyncio.run(provider.transcribe_video(video_path, duration))
-    finally:
-        asyncio.run(provider.close())
+    provider = _get_sync_provider(**kwargs)
+    return _run_sync(provider.transcribe_video(video_path, duration))
 
 
 def generate_cards_sync(
@@ -562,8 +852,5 @@ def generate_cards_sync(
     **kwargs
 ) -> List[ActivityCard]:
     """同步版本的卡片生成"""
-    provider = DayflowBackendProvider(**kwargs)
-    try:
-        return asyncio.run(provider.generate_activity_cards(observations, context_cards))
-    finally:
-        asyncio.run(provider.close())
+    provider = _get_sync_provider(**kwargs)
+    return _run_sync(provider.generate_activity_cards(observations, context_cards))
@@ -3,8 +3,11 @@ Dayflow - 统计数据收集器
 用于 Web Dashboard 导出功能
 """
 import logging
-from datetime import date, datetime, timedelta
-from typing import List, Dict, Optional
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
 
 from database.storage import StorageManager
 
@@ -37,6 +40,30 @@ def get_category_color(category: str, default_color: str) -> str:
     return get_category_colors().get(category, default_color)
 
 
+@dataclass
+class StatsBundle:
+    """仪表盘统计数据集合（单次遍历汇总的结果）"""
+    # 概览统计
+    total_duration: int
+    avg_productivity: float
+    deep_work_duration: int
+    activity_count: int
+    
+    # 图表数据
+    category_distribution: List[Dict]
+    hourly_efficiency: List[Dict]
+    weekly_trend: List[Dict]
+    top_applications: List[Dict]
+    
+    # 活动列表
+    activities: List[Dict]
+
+
+def _day_bounds(start_date: date, end_date: date) -> Tuple[datetime, datetime]:
+    """日期范围（含两端）对应的半开时间区间 [start_date 00:00, end_date 次日 00:00)"""
+    return datetime.combine(start_date, time.min), datetime.combine(end_date + timedelta(days=1), time.min)
+
+
 class StatsCollector:
     """统计数据收集器"""
     
@@ -45,14 +72,11 @@ class StatsCollector:
     
     def _get_cards_in_range(self, start_date: date, end_date: date) -> List:
         """获取日期范围内的所有卡片"""
-        cards = []
-        current = start_date
-        while current <= end_date:
-            dt = datetime(current.year, current.month, current.day)
-            day_cards = self.storage.get_cards_for_date(dt)
-            cards.extend(day_cards)
-            current += timedelta(days=1)
-        return cards
+        return self.storage.get_cards_in_range(*_day_bounds(start_date, end_date))
+    
+    def _get_card_arrays(self, start_date: date, end_date: date) -> Dict[str, np.ndarray]:
+        """获取日期范围内卡片的数值列数组（不解析 JSON 字段）"""
+        return self.storage.get_cards_arrays(*_day_bounds(start_date, end_date))
     
     def get_total_duration(self, start_date: date, end_date: date) -> int:
         """
@@ -65,9 +89,7 @@ class StatsCollector:
         Returns:
             总时长（分钟）
         """
-        cards = self._get_cards_in_range(start_date, end_date)
-        total_minutes = sum(card.duration_minutes for card in cards)
-        return int(total_minutes)
+        return int(self._get_card_arrays(start_date, end_date)["durations"].sum())
     
     def get_avg_productivity(self, start_date: date, end_date: date) -> float:
         """
@@ -80,24 +102,8 @@ class StatsCollector:
         Returns:
             平均效率评分 (0-100)
         """
-        cards = self._get_cards_in_range(start_date, end_date)
-        if not cards:
-            return 0.0
-        
-        # 按时长加权平均
-        total_weighted_score = 0.0
-        total_duration = 0.0
-        
-        for card in cards:
-            duration = card.duration_minutes
-            if duration > 0:
-                total_weighted_score += card.productivity_score * duration
-                total_duration += duration
-        
-        if total_duration == 0:
-            return 0.0
-        
-        return round(total_weighted_score / total_duration, 1)
+        arrays = self._get_card_arrays(start_date, end_date)
+        return self._weighted_avg_score(arrays["durations"], arrays["scores"])
     
     def get_deep_work_duration(self, start_date: date, end_date: date) -> int:
         """
@@ -110,13 +116,8 @@ class StatsCollector:
         Returns:
             深度工作时长（分钟）
         """
-        cards = self._get_cards_in_range(start_date, end_date)
-        deep_work_minutes = sum(
-            card.duration_minutes 
-            for card in cards 
-            if card.productivity_score >= 80
-        )
-        return int(deep_work_minutes)
+        arrays = self._get_card_arrays(start_date, end_date)
+        return int(arrays["durations"][arrays["scores"] >= 80].sum())
     
     def get_activity_count(self, start_date: date, end_date: date) -> int:
         """
@@ -129,8 +130,7 @@ class StatsCollector:
         Returns:
             活动数量
         """
-        cards = self._get_cards_in_range(start_date, end_date)
-        return len(cards)
+        return len(self._get_card_arrays(start_date, end_date)["durations"])
 
     def get_category_distribution(self, start_date: date, end_date: date) -> List[Dict]:
         """
@@ -147,12 +147,16 @@ class StatsCollector:
         
         # 按分类汇总时长
         category_duration = {}
+        other = _("其他")
         for card in cards:
-            category = card.category or _("其他")
-            duration = card.duration_minutes
-            category_duration[category] = category_duration.get(category, 0) + duration
+            category = card.category or other
+            category_duration[category] = category_duration.get(category, 0) + card.duration_minutes
         
-        # 转换为图表数据格式
+        return self._build_category_distribution(category_duration)
+    
+    @staticmethod
+    def _build_category_distribution(category_duration: Dict[str, float]) -> List[Dict]:
+        """将分类时长汇总转换为图表数据格式"""
         result = []
         for category, duration in sorted(category_duration.items(), key=lambda x: -x[1]):
             result.append({
@@ -173,26 +177,14 @@ class StatsCollector:
         Returns:
             每小时效率列表 [{hour, score, duration}]
         """
-        dt = datetime(target_date.year, target_date.month, target_date.day)
-        cards = self.storage.get_cards_for_date(dt)
-        
-        # 初始化 24 小时数据
-        hourly_data = {h: {"score_sum": 0, "duration": 0} for h in range(24)}
-        
-        for card in cards:
-            if not card.start_time or not card.end_time:
-                continue
-            
-            # 计算活动覆盖的小时
-            start_hour = card.start_time.hour
-            end_hour = card.end_time.hour
-            
-            # 简化处理：将活动分配到开始小时
-            duration = card.duration_minutes
-            hourly_data[start_hour]["score_sum"] += card.productivity_score * duration
-            hourly_data[start_hour]["duration"] += duration
-        
-        # 计算每小时平均效率
+        arrays = self._get_card_arrays(target_date, target_date)
+        # 简化处理：将活动分配到开始小时
+        hourly_data = self._hourly_data(arrays["durations"], arrays["scores"], arrays["hours"])
+        return self._build_hourly_efficiency(hourly_data)
+    
+    @staticmethod
+    def _build_hourly_efficiency(hourly_data: Dict[int, Dict]) -> List[Dict]:
+        """计算每小时平均效率"""
         result = []
         for hour in range(24):
             data = hourly_data[hour]
@@ -219,22 +211,24 @@ class StatsCollector:
         Returns:
             每日趋势列表 [{date, duration, score}]
         """
+        start_date = end_date - timedelta(days=6)
+        arrays = self.storage.get_cards_arrays(*_day_bounds(start_date, end_date))
+        
+        # 按天汇总时长与加权评分（第 0 天为 7 天前）
+        durations = arrays["durations"]
+        day_index = arrays["days"] - start_date.toordinal()
+        day_durations = np.bincount(day_index, weights=durations, minlength=7).tolist()
+        day_score_sums = np.bincount(day_index, weights=arrays["scores"] * durations, minlength=7).tolist()
+        
         result = []
         
-        for i in range(6, -1, -1):  # 从7天前到今天
-            target_date = end_date - timedelta(days=i)
-            dt = datetime(target_date.year, target_date.month, target_date.day)
-            cards = self.storage.get_cards_for_date(dt)
-            
-            total_duration = sum(card.duration_minutes for card in cards)
+        for i in range(7):  # 从7天前到今天
+            target_date = start_date + timedelta(days=i)
+            total_duration = day_durations[i]
             
             # 计算加权平均效率
             if total_duration > 0:
-                weighted_score = sum(
-                    card.productivity_score * card.duration_minutes 
-                    for card in cards
-                )
-                avg_score = weighted_score / total_duration
+                avg_score = day_score_sums[i] / total_duration
             else:
                 avg_score = 0
             
@@ -266,9 +260,13 @@ class StatsCollector:
         for card in cards:
             for app_site in card.app_sites:
                 name = app_site.name
-                duration = app_site.duration_seconds / 60  # 转为分钟
-                app_duration[name] = app_duration.get(name, 0) + duration
+                app_duration[name] = app_duration.get(name, 0) + app_site.duration_seconds / 60  # 转为分钟
         
+        return self._build_top_applications(app_duration, limit)
+    
+    @staticmethod
+    def _build_top_applications(app_duration: Dict[str, float], limit: int) -> List[Dict]:
+        """按使用时长排序并计算占比"""
         # 计算总时长
         total_duration = sum(app_duration.values())
         
@@ -302,23 +300,125 @@ class StatsCollector:
         # 按开始时间排序
         cards.sort(key=lambda c: c.start_time or datetime.min)
         
-        result = []
-        for card in cards:
-            # 获取主要应用名称
-            main_app = card.app_sites[0].name if card.app_sites else ""
+        return [self._card_to_activity(card, card.duration_minutes) for card in cards]
+    
+    @staticmethod
+    def _card_to_activity(card, duration: float) -> Dict:
+        """将卡片转换为活动列表项"""
+        # 获取主要应用名称
+        main_app = card.app_sites[0].name if card.app_sites else ""
+        
+        return {
+            "start": card.start_time.strftime("%H:%M") if card.start_time else "",
+            "end": card.end_time.strftime("%H:%M") if card.end_time else "",
+            "date": card.start_time.strftime("%Y-%m-%d") if card.start_time else "",
+            "category": card.category or _("其他"),
+            "category_color": get_category_color(card.category, CATEGORY_COLORS["其他"]),
+            "title": card.title,
+            "summary": card.summary,
+            "score": card.productivity_score,
+            "duration": round(duration, 1),
+            "main_app": main_app,
+            "apps": [app.name for app in card.app_sites]
+        }
+    
+    def aggregate_all(self, start_date: date, end_date: date, top_apps_limit: int = 5) -> StatsBundle:
+        """
+        一次性获取仪表盘所需的全部统计数据
+        
+        只加载一次日期范围内的卡片，并在单次遍历中完成所有汇总（供导出使用）；
+        单独的 get_* 方法只计算各自的指标。
+        
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期（每小时效率按该日统计）
+            top_apps_limit: 应用排行数量限制
             
-            result.append({
-                "start": card.start_time.strftime("%H:%M") if card.start_time else "",
-                "end": card.end_time.strftime("%H:%M") if card.end_time else "",
-                "date": card.start_time.strftime("%Y-%m-%d") if card.start_time else "",
-                "category": card.category or _("其他"),
-                "category_color": get_category_color(card.category, CATEGORY_COLORS["其他"]),
-                "title": card.title,
-                "summary": card.summary,
-                "score": card.productivity_score,
-                "duration": round(card.duration_minutes, 1),
-                "main_app": main_app,
-                "apps": [app.name for app in card.app_sites]
-            })
+        Returns:
+            StatsBundle
+        """
+        cards = self._get_cards_in_range(start_date, end_date)
+        cards.sort(key=lambda c: c.start_time or datetime.min)
+        count = len(cards)
         
-        return result
+        # 数值列一次性转为数组（列式存储），再用向量化运算完成汇总
+        durations = np.fromiter((card.duration_minutes for card in cards), dtype=np.float64, count=count)
+        scores = np.fromiter((card.productivity_score for card in cards), dtype=np.float64, count=count)
+        # 每小时效率只统计结束日期当天（简化处理：将活动分配到开始小时），其余卡片记为 -1
+        hours = np.fromiter(
+            (
+                card.start_time.hour
+                if card.start_time and card.end_time and card.start_time.date() == end_date
+                else -1
+                for card in cards
+            ),
+            dtype=np.int64,
+            count=count
+        )
+        numeric = self._aggregate_numeric(durations, scores, hours)
+        
+        category_duration = {}
+        app_duration = {}
+        activities = []
+        
+        for card, duration in zip(cards, durations.tolist()):
+            category = card.category or _("其他")
+            category_duration[category] = category_duration.get(category, 0) + duration
+            
+            for app_site in card.app_sites:
+                name = app_site.name
+                app_duration[name] = app_duration.get(name, 0) + app_site.duration_seconds / 60  # 转为分钟
+            
+            activities.append(self._card_to_activity(card, duration))
+        
+        return StatsBundle(
+            total_duration=numeric["total_duration"],
+            avg_productivity=numeric["avg_productivity"],
+            deep_work_duration=numeric["deep_work_duration"],
+            activity_count=count,
+            category_distribution=self._build_category_distribution(category_duration),
+            hourly_efficiency=self._build_hourly_efficiency(numeric["hourly_data"]),
+            weekly_trend=self.get_weekly_trend(end_date),
+            top_applications=self._build_top_applications(app_duration, top_apps_limit),
+            activities=activities,
+        )
+    
+    @staticmethod
+    def _aggregate_numeric(durations: np.ndarray, scores: np.ndarray, hours: np.ndarray) -> Dict:
+        """
+        对时长/评分/小时数组做一次性汇总
+        
+        Args:
+            durations: 每张卡片的时长（分钟）
+            scores: 每张卡片的效率评分
+            hours: 每张卡片计入的小时（0-23），-1 表示不计入每小时效率
+            
+        Returns:
+            {total_duration, avg_productivity, deep_work_duration, hourly_data}
+        """
+        return {
+            "total_duration": int(durations.sum()),
+            "avg_productivity": StatsCollector._weighted_avg_score(durations, scores),
+            "deep_work_duration": int(durations[scores >= 80].sum()),
+            "hourly_data": StatsCollector._hourly_data(durations, scores, hours),
+        }
+    
+    @staticmethod
+    def _weighted_avg_score(durations: np.ndarray, scores: np.ndarray) -> float:
+        """按时长加权平均效率评分（只统计时长为正的活动）"""
+        positive = durations > 0
+        weighted_duration = durations[positive].sum()
+        if weighted_duration > 0:
+            return round(float(np.dot(scores[positive], durations[positive]) / weighted_duration), 1)
+        return 0.0
+    
+    @staticmethod
+    def _hourly_data(durations: np.ndarray, scores: np.ndarray, hours: np.ndarray) -> Dict[int, Dict]:
+        """每小时时长与加权评分之和（hours 为 -1 的卡片不计入）"""
+        in_day = hours >= 0
+        hour_durations = np.bincount(hours[in_day], weights=durations[in_day], minlength=24)
+        hour_score_sums = np.bincount(hours[in_day], weights=(scores * durations)[in_day], minlength=24)
+        return {
+            hour: {"score_sum": score_sum, "duration": duration}
+            for hour, (score_sum, duration) in enumerate(zip(hour_score_sums.tolist(), hour_durations.tolist()))
+        }
@@ -3,23 +3,34 @@ Dayflow - 自动更新模块
 支持版本检查、多源下载、后台更新
 """
 import os
+import re
 import sys
 import json
 import logging
 import threading
+import time
 import shutil
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional, Callable, Tuple
 from dataclasses import dataclass
 
 import httpx
+from packaging.version import Version, InvalidVersion
 
 import config
 from i18n import _
 
 logger = logging.getLogger(__name__)
 
+# 可选：orjson 解析 Release JSON 更快
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # 下载源列表（按优先级排序）
 DOWNLOAD_MIRRORS = [
     # GitHub 原始地址
@@ -30,10 +41,71 @@ DOWNLOAD_MIRRORS = [
     "https://gh.ddlc.top/https://github.com/{repo}/releases/download/{tag}/{filename}",
 ]
 
+# 下载读取块大小与进度回调间隔（秒，10 Hz）
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+PROGRESS_INTERVAL = 0.1
+
+# 多源并行分段下载：每段最小字节数，每个可用源的并发连接数
+RANGE_MIN_SIZE = 512 * 1024
+RANGE_CONNECTIONS_PER_MIRROR = 2
+
+# 下载请求不接受压缩编码：发布文件本身已是压缩包，且文件大小、分段偏移都按原始字节计算
+IDENTITY_HEADERS = {'Accept-Encoding': 'identity'}
+
+# 下载源延迟缓存有效期（秒）：按上次探测的响应时间排序下载源，最快的源优先
+MIRROR_LATENCY_TTL = 24 * 3600
+
+
+class RangeNotSupportedError(Exception):
+    """下载源不支持 Range 请求（返回 200 而不是 206，或返回压缩编码的分段）"""
+    pass
+
+# 版本号回退解析：从不规范的 tag（如 "Dayflow-1.2.3"、"1.2.3-hotfix"）中提取数字版本
+_VER_RE = re.compile(r'(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:[-.]?((?:rc|a|b|alpha|beta|dev)\d*))?', re.IGNORECASE)
+
 # GitHub API
 GITHUB_API_URL = "https://api.github.com/repos/{repo}/releases/latest"
 
 
+def _preallocate_file(f, size: int):
+    """
+    预分配下载文件空间，避免边写边扩展文件导致碎片和频繁的元数据更新
+    
+    Linux 上用 posix_fallocate 一次性保留磁盘块；Windows 上 truncate 即 SetEndOfFile。
+    """
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+            return
+        except OSError:
+            pass
+    f.truncate(size)
+
+
+def _create_http_client() -> httpx.Client:
+    """创建更新用的 HTTP 客户端（HTTP/2 + 连接池，检查与下载之间复用 TLS 连接）"""
+    return httpx.Client(
+        http2=True,
+        timeout=httpx.Timeout(10.0, read=300.0),
+        limits=httpx.Limits(max_connections=10),
+        follow_redirects=True
+    )
+
+
+def _create_range_client(connections: int) -> httpx.Client:
+    """
+    创建分段下载用的 HTTP/1.1 客户端
+    
+    HTTP/2 会把同一主机的多个分段复用到一条 TCP 连接上，
+    分段下载需要每个分段各占一条连接才能叠加带宽。
+    """
+    return httpx.Client(
+        timeout=httpx.Timeout(10.0, read=60.0),
+        limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+        follow_redirects=True
+    )
+
+
 @dataclass
 class UpdateInfo:
     """更新信息"""
@@ -49,9 +121,13 @@ class UpdateInfo:
 class UpdateChecker:
     """版本检查器"""
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.Client] = None):
+        # 由调用方（UpdateManager）注入并负责关闭；未注入时每次检查临时创建
+        self._client = client
         self.repo = config.GITHUB_REPO
         self.current_version = config.VERSION
+        self._current_parsed = self._parse_version(self.current_version)
+        self.cache_path = config.APP_DATA_DIR / "update_cache.json"
     
     def check(self) -> UpdateInfo:
         """
@@ -63,33 +139,27 @@ class UpdateChecker:
         info = UpdateInfo(current_version=self.current_version)
         
         try:
-            url = GITHUB_API_URL.format(repo=self.repo)
-            
-            with httpx.Client(timeout=10.0) as client:
-                resp = client.get(url, follow_redirects=True)
-                resp.raise_for_status()
-                data = resp.json()
+            release = self._fetch_release()
             
             # 解析版本号（去掉 v 前缀）
-            latest_tag = data.get('tag_name', '')
-            info.latest_version = latest_tag.lstrip('v')
-            info.release_notes = data.get('body', '')
+            info.latest_version = release['tag_name'].lstrip('v')
+            info.release_notes = release['body']
             
             # 比较版本
             if self._compare_versions(info.latest_version, self.current_version) > 0:
                 info.has_update = True
                 
                 # 查找下载链接（优先 ZIP，其次 EXE）
-                for asset in data.get('assets', []):
+                for asset in release['assets']:
                     name_lower = asset['name'].lower()
                     if name_lower.endswith('.zip'):
                         info.download_url = asset['browser_download_url']
-                        info.file_size = asset.get('size', 0)
+                        info.file_size = asset['size']
                         info.filename = asset['name']
                         break
                     elif name_lower.endswith('.exe') and not info.filename:
                         info.download_url = asset['browser_download_url']
-                        info.file_size = asset.get('size', 0)
+                        info.file_size = asset['size']
                         info.filename = asset['name']
             
             logger.info(f"版本检查完成: 当前 {self.current_version}, 最新 {info.latest_version}")
@@ -102,31 +172,111 @@ class UpdateChecker:
             logger.warning(f"检查更新失败: {e}")
             return info
     
+    def _fetch_release(self) -> dict:
+        """
+        获取最新 Release 信息
+        
+        只在读取响应体期间占用连接：非流式请求返回时响应体已读完，
+        连接随即归还连接池，JSON 解析和资源筛选都在此之后进行，
+        紧接着的下载可以直接复用该连接。
+        """
+        if self._client is None:
+            with _create_http_client() as client:
+                return self._request_release(client)
+        return self._request_release(self._client)
+    
+    def _request_release(self, client: httpx.Client) -> dict:
+        """请求 Release API（ETag 条件请求）并缓存精简后的结果"""
+        url = GITHUB_API_URL.format(repo=self.repo)
+        
+        # 带上次的 ETag 做条件请求，未变化时 GitHub 返回 304 且不计入速率限制
+        cache = self._load_cache()
+        headers = {'If-None-Match': cache['etag']} if cache else {}
+        
+        resp = client.get(url, headers=headers, timeout=10.0)
+        if resp.status_code == 304 and cache:
+            return cache['release']
+        
+        resp.raise_for_status()
+        etag = resp.headers.get('ETag')
+        content = resp.content
+        resp.close()
+        
+        release = self._select_release_fields(_json_loads(content))
+        self._save_cache(etag, release)
+        return release
+    
+    def _load_cache(self) -> Optional[dict]:
+        """读取缓存的 Release 信息与 ETag"""
+        try:
+            cache = json.loads(self.cache_path.read_text(encoding='utf-8'))
+            if cache.get('etag') and isinstance(cache.get('release'), dict):
+                return cache
+        except Exception:
+            pass
+        return None
+    
+    @staticmethod
+    def _select_release_fields(data: dict) -> dict:
+        """只保留 Release JSON 中用到的字段"""
+        return {
+            'tag_name': data.get('tag_name') or '',
+            'body': data.get('body') or '',
+            'assets': [
+                {
+                    'name': asset['name'],
+                    'browser_download_url': asset['browser_download_url'],
+                    'size': asset.get('size', 0),
+                }
+                for asset in data.get('assets', [])
+            ],
+        }
+    
+    def _save_cache(self, etag: Optional[str], release: dict):
+        """缓存精简后的 Release 信息与 ETag"""
+        if not etag:
+            return
+        try:
+            self.cache_path.write_text(
+                json.dumps({'etag': etag, 'release': release}, ensure_ascii=False),
+                encoding='utf-8'
+            )
+        except Exception as e:
+            logger.debug(f"写入更新缓存失败: {e}")
+    
+    @staticmethod
+    def _parse_version(version: str) -> Optional[Version]:
+        """解析版本号（兼容 v 前缀、1.2.3-rc1 等 GitHub tag 写法），无法解析时返回 None"""
+        try:
+            return Version(version.strip().lstrip('vV'))
+        except InvalidVersion:
+            pass
+        
+        # 回退：用预编译正则提取 主.次.修订[预发布] 部分
+        match = _VER_RE.search(version)
+        if match:
+            major, minor, patch, pre = match.groups()
+            normalized = f"{major}.{minor or 0}.{patch or 0}{pre or ''}"
+            try:
+                return Version(normalized)
+            except InvalidVersion:
+                return Version(f"{major}.{minor or 0}.{patch or 0}")
+        
+        logger.warning(f"无法解析版本号: {version}")
+        return None
+    
     def _compare_versions(self, v1: str, v2: str) -> int:
         """
-        比较版本号
+        比较版本号（PEP 440 语义，支持预发布版本）
         
         Returns:
-            1 if v1 > v2, -1 if v1 < v2, 0 if equal
+            1 if v1 > v2, -1 if v1 < v2, 0 if equal or unparsable
         """
-        try:
-            parts1 = [int(x) for x in v1.split('.')]
-            parts2 = [int(x) for x in v2.split('.')]
-            
-            # 补齐长度
-            while len(parts1) < len(parts2):
-                parts1.append(0)
-            while len(parts2) < len(parts1):
-                parts2.append(0)
-            
-            for a, b in zip(parts1, parts2):
-                if a > b:
-                    return 1
-                elif a < b:
-                    return -1
-            return 0
-        except:
+        parsed1 = self._parse_version(v1)
+        parsed2 = self._current_parsed if v2 == self.current_version else self._parse_version(v2)
+        if parsed1 is None or parsed2 is None:
             return 0
+        return (parsed1 > parsed2) - (parsed1 < parsed2)
 
 
 class UpdateDownloader:
@@ -136,8 +286,11 @@ class UpdateDownloader:
         self,
         update_info: UpdateInfo,
         on_progress: Optional[Callable[[float], None]] = None,
-        on_complete: Optional[Callable[[bool, str], None]] = None
+        on_complete: Optional[Callable[[bool, str], None]] = None,
+        client: Optional[httpx.Client] = None
     ):
+        # 由调用方注入并负责关闭；未注入时在下载线程内创建，下载结束后关闭
+        self._client = client
         self.update_info = update_info
         self.on_progress = on_progress
         self.on_complete = on_complete
@@ -152,6 +305,17 @@ class UpdateDownloader:
             self.target_path = self.pending_dir / "Dayflow_new.exe"
         
         self._cancelled = False
+        
+        # 下载线程只更新计数，由独立的进度线程按固定频率回调
+        self._downloaded = 0
+        self._total = 0
+        self._progress_stop = threading.Event()
+        self._progress_thread: Optional[threading.Thread] = None
+        self._last_percent = -1.0
+        
+        # 各下载源主机的 HEAD 响应时间（秒），持久化后供下次更新排序
+        self.latency_cache_path = config.APP_DATA_DIR / "mirror_latency.json"
+        self._mirror_latency: dict = {}
     
     def start(self):
         """在后台线程开始下载"""
@@ -164,6 +328,52 @@ class UpdateDownloader:
     
     def _download(self):
         """执行下载（尝试多个源）"""
+        owns_client = self._client is None
+        if owns_client:
+            self._client = _create_http_client()
+        if self.on_progress:
+            self._progress_thread = threading.Thread(target=self._progress_loop, daemon=True)
+            self._progress_thread.start()
+        try:
+            self._download_all()
+        finally:
+            self._stop_progress()
+            if owns_client:
+                self._client.close()
+                self._client = None
+    
+    def _stop_progress(self):
+        """停止进度线程，确保完成回调之后不会再有进度回调"""
+        self._progress_stop.set()
+        if self._progress_thread is not None:
+            self._progress_thread.join()
+            self._progress_thread = None
+    
+    def _complete(self, success: bool, message: str):
+        """停止进度线程后补发最后一次进度，再回调下载结果"""
+        self._stop_progress()
+        if success:
+            self._emit_progress()
+        if self.on_complete:
+            self.on_complete(success, message)
+    
+    def _progress_loop(self):
+        """按 PROGRESS_INTERVAL 采样下载计数并回调进度"""
+        while not self._progress_stop.wait(PROGRESS_INTERVAL):
+            self._emit_progress()
+    
+    def _emit_progress(self):
+        """回调当前进度；总大小未知或进度未变化时不回调"""
+        total = self._total
+        if not self.on_progress or total <= 0:
+            return
+        percent = self._downloaded / total * 100
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self.on_progress(percent)
+    
+    def _download_all(self):
+        """依次尝试并行下载和逐个下载源"""
         try:
             # 创建目录
             self.pending_dir.mkdir(parents=True, exist_ok=True)
@@ -172,32 +382,57 @@ class UpdateDownloader:
             tag = f"v{self.update_info.latest_version}"
             filename = self.update_info.filename or "Dayflow.exe"
             
-            # 尝试多个下载源
+            # 去重后按上次测得的延迟排序
+            urls = list(dict.fromkeys(
+                mirror_template.format(repo=config.GITHUB_REPO, tag=tag, filename=filename)
+                for mirror_template in DOWNLOAD_MIRRORS
+            ))
+            self._mirror_latency = self._load_mirror_latency()
+            urls = self._order_by_latency(urls)
+            
+            # 优先从所有可用源并行分段下载
+            try:
+                if self._download_parallel(urls):
+                    self._finish_download()
+                    return
+            except Exception as e:
+                logger.warning(f"并行下载失败，改为逐个尝试下载源: {e}")
+            
+            # 已取消时不再回退到其他下载源（与逐个尝试时的取消处理一致）
+            if self._cancelled:
+                return
+            
+            # 并行下载前刚探测过各源，按本次延迟重新排序
+            urls = self._order_by_latency(urls)
             last_error = ""
-            for mirror_template in DOWNLOAD_MIRRORS:
+            
+            # 同时向所有源发起请求，使用最先返回响应的源，避免卡在连接超时的源上
+            fastest = self._open_fastest_mirror(urls)
+            if fastest is not None:
+                fastest_url, response = fastest
+                logger.info(f"最快的下载源: {fastest_url[:70]}...")
+                try:
+                    if self._save_response(response):
+                        self._finish_download()
+                        return
+                except Exception as e:
+                    last_error = str(e)
+                    logger.warning(f"下载源失败: {e}")
+                finally:
+                    response.close()
+                urls = [url for url in urls if url != fastest_url]
+            
+            # 逐个尝试其余下载源
+            for url in urls:
                 if self._cancelled:
                     return
                 
-                url = mirror_template.format(
-                    repo=config.GITHUB_REPO,
-                    tag=tag,
-                    filename=filename
-                )
-                
                 logger.info(f"尝试下载源: {url[:70]}...")
                 
                 try:
                     success = self._download_from_url(url)
                     if success:
-                        # 如果是 ZIP，解压
-                        if self.is_zip:
-                            self._extract_zip()
-                        
-                        # 下载成功，写入更新信息
-                        self._save_update_info()
-                        
-                        if self.on_complete:
-                            self.on_complete(True, "")
+                        self._finish_download()
                         return
                 except Exception as e:
                     last_error = str(e)
@@ -205,36 +440,255 @@ class UpdateDownloader:
                     continue
             
             # 所有源都失败
-            if self.on_complete:
-                self.on_complete(False, _("所有下载源都失败: {last_error}").format(last_error=last_error))
+            self._complete(False, _("所有下载源都失败: {last_error}").format(last_error=last_error))
                 
         except Exception as e:
             logger.error(f"下载过程出错: {e}")
-            if self.on_complete:
-                self.on_complete(False, str(e))
+            self._complete(False, str(e))
+    
+    def _finish_download(self):
+        """下载完成后的处理：解压并写入更新信息"""
+        # 如果是 ZIP，解压
+        if self.is_zip:
+            self._extract_zip()
+        
+        # 下载成功，写入更新信息
+        self._save_update_info()
+        
+        self._complete(True, "")
+    
+    def _load_mirror_latency(self) -> dict:
+        """读取未过期的下载源延迟缓存"""
+        try:
+            cache = _json_loads(self.latency_cache_path.read_bytes())
+            if time.time() - cache['saved_at'] < MIRROR_LATENCY_TTL:
+                return dict(cache['latency'])
+        except Exception:
+            pass
+        return {}
+    
+    def _save_mirror_latency(self):
+        """保存下载源延迟缓存"""
+        try:
+            self.latency_cache_path.write_text(
+                json.dumps({'saved_at': time.time(), 'latency': self._mirror_latency}),
+                encoding='utf-8'
+            )
+        except Exception as e:
+            logger.debug(f"保存下载源延迟缓存失败: {e}")
+    
+    def _order_by_latency(self, urls: list) -> list:
+        """按主机延迟升序排列下载源，没有测量值（或探测失败）的源保持原顺序排在最后"""
+        latency = self._mirror_latency
+        if not latency:
+            return urls
+        return sorted(urls, key=lambda url: latency.get(httpx.URL(url).host, float('inf')))
+    
+    def _probe_mirror(self, url: str) -> Optional[Tuple[str, int]]:
+        """HEAD 请求探测下载源并记录响应时间，返回 (最终 URL, 文件大小)，不可用时返回 None"""
+        host = httpx.URL(url).host
+        try:
+            started = time.monotonic()
+            resp = self._client.head(url, timeout=10.0)
+            resp.raise_for_status()
+            size = int(resp.headers.get('content-length', 0))
+            if size > 0:
+                self._mirror_latency[host] = time.monotonic() - started
+                return str(resp.url), size
+        except Exception as e:
+            logger.debug(f"下载源探测失败: {url[:70]}: {e}")
+        self._mirror_latency.pop(host, None)
+        return None
+    
+    def _download_parallel(self, urls: list) -> bool:
+        """
+        从多个下载源并行分段下载（HTTP Range），聚合各源带宽
+        
+        Returns:
+            bool: 是否下载成功；可用源不足或文件太小时返回 False（由调用方逐源下载）
+            
+        Raises:
+            RangeNotSupportedError: 某个源不支持 Range 请求
+        """
+        with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+            results = dict(zip(urls, executor.map(self._probe_mirror, urls)))
+        self._save_mirror_latency()
+        # 按本次探测的延迟排序，分段轮询分配时最快的源先开始
+        probes = [results[url] for url in self._order_by_latency(urls) if results[url]]
+        
+        if not probes:
+            return False
+        
+        # 以最小的文件大小为准，只使用大小一致的源
+        total = self.update_info.file_size or min(size for _, size in probes)
+        live_urls = [url for url, size in probes if size == total]
+        if not live_urls or total < RANGE_MIN_SIZE * 2:
+            return False
+        
+        connections = len(live_urls) * RANGE_CONNECTIONS_PER_MIRROR
+        range_size = max(RANGE_MIN_SIZE, -(-total // (connections * 4)))
+        ranges = [(start, min(start + range_size, total) - 1) for start in range(0, total, range_size)]
+        
+        logger.info(f"并行下载: {len(live_urls)} 个源, {len(ranges)} 段")
+        
+        temp_path = self.target_path.with_suffix('.tmp')
+        with open(temp_path, 'wb') as f:
+            _preallocate_file(f, total)
+        
+        lock = threading.Lock()
+        # 任一段在所有源上都失败后置位，其余分段随即停止
+        stop = threading.Event()
+        self._downloaded = 0
+        self._total = total
+        
+        def fetch_range(client: httpx.Client, index: int):
+            start, end = ranges[index]
+            # 按轮询分配源，失败时依次换用其他源
+            order = live_urls[index % len(live_urls):] + live_urls[:index % len(live_urls)]
+            last_error = None
+            for url in order:
+                if self._cancelled or stop.is_set():
+                    return
+                written = 0
+                try:
+                    with client.stream('GET', url,
+                                       headers={'Range': f'bytes={start}-{end}', **IDENTITY_HEADERS}) as response:
+                        response.raise_for_status()
+                        if response.status_code != 206:
+                            raise RangeNotSupportedError(url)
+                        # 压缩编码的分段无法按原始字节偏移写入
+                        if response.headers.get('content-encoding', 'identity') != 'identity':
+                            raise RangeNotSupportedError(url)
+                        
+                        with open(temp_path, 'r+b') as f:
+                            f.seek(start)
+                            for chunk in response.iter_raw(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                                if self._cancelled or stop.is_set():
+                                    return
+                                f.write(chunk)
+                                written += len(chunk)
+                                self._add_progress(lock, len(chunk))
+                    
+                    if written != end - start + 1:
+                        raise IOError(_("下载不完整: {downloaded}/{total} 字节").format(downloaded=written, total=end - start + 1))
+                    return
+                except RangeNotSupportedError:
+                    raise
+                except Exception as e:
+                    # 回退本段已计入的进度，换下一个源重试
+                    self._add_progress(lock, -written)
+                    last_error = e
+                    logger.debug(f"分段下载失败 {start}-{end}: {url[:70]}: {e}")
+            raise last_error
+        
+        try:
+            workers = min(connections, len(ranges))
+            with _create_range_client(workers) as range_client, \
+                    ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(fetch_range, range_client, index) for index in range(len(ranges))]
+                try:
+                    for future in as_completed(futures):
+                        future.result()
+                except Exception:
+                    # 第一个失败的分段即终止整个并行下载：通知进行中的分段停止，取消排队中的分段
+                    stop.set()
+                    executor.shutdown(cancel_futures=True)
+                    raise
+        except Exception:
+            temp_path.unlink(missing_ok=True)
+            raise
+        
+        if self._cancelled:
+            temp_path.unlink(missing_ok=True)
+            return False
+        
+        if self.target_path.exists():
+            self.target_path.unlink()
+        temp_path.rename(self.target_path)
+        return True
+    
+    def _add_progress(self, lock: threading.Lock, delta: int):
+        """并行下载时汇总各段的下载字节数"""
+        with lock:
+            self._downloaded += delta
+    
+    def _open_fastest_mirror(self, urls: list) -> Optional[Tuple[str, httpx.Response]]:
+        """
+        并发向所有下载源发起 GET 请求，返回最先成功返回响应头的 (URL, 响应)
+        
+        其余请求完成后立即关闭；仍在连接中的请求不等待，结束后自行关闭。
+        """
+        lock = threading.Lock()
+        winner = {}
+        
+        def open_stream(url: str) -> Optional[httpx.Response]:
+            response = self._client.send(
+                self._client.build_request('GET', url, headers=IDENTITY_HEADERS), stream=True
+            )
+            with lock:
+                if not winner and response.is_success and not self._cancelled:
+                    winner['url'] = url
+                    return response
+            response.close()
+            return None
+        
+        executor = ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix="mirror-race")
+        try:
+            futures = {executor.submit(open_stream, url): url for url in urls}
+            for future in as_completed(futures):
+                try:
+                    response = future.result()
+                except Exception as e:
+                    logger.debug(f"下载源连接失败: {futures[future][:70]}: {e}")
+                    continue
+                if response is not None:
+                    return futures[future], response
+            return None
+        finally:
+            executor.shutdown(wait=False)
     
     def _download_from_url(self, url: str) -> bool:
         """从指定 URL 下载"""
+        with self._client.stream('GET', url, headers=IDENTITY_HEADERS) as response:
+            return self._save_response(response)
+    
+    def _save_response(self, response: httpx.Response) -> bool:
+        """将已打开的下载响应写入目标文件"""
         temp_path = self.target_path.with_suffix('.tmp')
         
         try:
-            with httpx.stream('GET', url, follow_redirects=True, timeout=300) as response:
-                response.raise_for_status()
-                
+            response.raise_for_status()
+            
+            # 发布文件是二进制包，未压缩传输时直接读取原始字节，跳过 httpx 的解码层；
+            # 源仍返回压缩编码时 Content-Length 是压缩后的大小，不能用于预分配和完整性校验
+            if response.headers.get('content-encoding', 'identity') == 'identity':
                 total = int(response.headers.get('content-length', 0))
-                downloaded = 0
+                chunks = response.iter_raw(chunk_size=DOWNLOAD_CHUNK_SIZE)
+            else:
+                total = 0
+                chunks = response.iter_bytes(chunk_size=DOWNLOAD_CHUNK_SIZE)
+            
+            downloaded = 0
+            self._downloaded = 0
+            self._total = total
+            
+            with open(temp_path, 'wb') as f:
+                if total > 0:
+                    # 预分配文件大小
+                    _preallocate_file(f, total)
                 
-                with open(temp_path, 'wb') as f:
-                    for chunk in response.iter_bytes(chunk_size=65536):
-                        if self._cancelled:
-                            temp_path.unlink(missing_ok=True)
-                            return False
-                        
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        if self.on_progress and total > 0:
-                            self.on_progress(downloaded / total * 100)
+                for chunk in chunks:
+                    if self._cancelled:
+                        f.close()
+                        temp_path.unlink(missing_ok=True)
+                        return False
+                    
+                    f.write(chunk)
+                    downloaded += len(chunk)
+                    self._downloaded = downloaded
+            
+            if total > 0 and downloaded != total:
+                raise IOError(_("下载不完整: {downloaded}/{total} 字节").format(downloaded=downloaded, total=total))
             
             # 下载完成，重命名
             if temp_path.exists():
@@ -250,50 +704,59 @@ class UpdateDownloader:
             raise e
     
     def _extract_zip(self):
-        """解压 ZIP 文件"""
-        extract_dir = self.pending_dir / "extracted"
-        extract_dir.mkdir(parents=True, exist_ok=True)
-        
+        """解压 ZIP 文件：Dayflow.exe 所在目录的内容直接流式写入 pending_dir，不经过临时目录"""
         logger.info(f"正在解压: {self.target_path}")
         
+        pending_root = self.pending_dir.resolve()
+        
         with zipfile.ZipFile(self.target_path, 'r') as zf:
-            zf.extractall(extract_dir)
-        
-        # 查找解压后的 Dayflow.exe
-        # 可能在根目录或子目录中
-        exe_path = None
-        for root, dirs, files in os.walk(extract_dir):
-            for f in files:
-                if f.lower() == 'dayflow.exe':
-                    exe_path = Path(root) / f
-                    break
-            if exe_path:
-                break
-        
-        if exe_path:
-            # 移动到 pending_dir/Dayflow_new.exe
-            new_exe_path = self.pending_dir / "Dayflow_new.exe"
-            shutil.move(str(exe_path), str(new_exe_path))
+            infos = zf.infolist()
             
-            # 复制同目录下的其他文件（DLL 等依赖）
-            exe_dir = exe_path.parent
-            for item in exe_dir.iterdir():
-                if item.is_file() and item != exe_path:
-                    dest = self.pending_dir / item.name
-                    shutil.copy2(str(item), str(dest))
-                elif item.is_dir():
-                    dest_dir = self.pending_dir / item.name
-                    if dest_dir.exists():
-                        shutil.rmtree(dest_dir)
-                    shutil.copytree(str(item), str(dest_dir))
+            # 查找 Dayflow.exe（可能在根目录或子目录中，取层级最浅的）
+            exe_candidates = [
+                info for info in infos
+                if not info.is_dir() and info.filename.rsplit('/', 1)[-1].lower() == 'dayflow.exe'
+            ]
+            if not exe_candidates:
+                raise FileNotFoundError(_("ZIP 中未找到 Dayflow.exe"))
+            exe_info = min(exe_candidates, key=lambda info: info.filename.count('/'))
+            prefix = exe_info.filename[:exe_info.filename.rfind('/') + 1]
             
-            logger.info(f"解压完成，找到 EXE: {new_exe_path}")
-        else:
-            raise FileNotFoundError(_("ZIP 中未找到 Dayflow.exe"))
+            replaced_dirs = set()
+            for info in infos:
+                if not info.filename.startswith(prefix) or info.filename == prefix:
+                    continue
+                rel_path = info.filename[len(prefix):]
+                
+                if info is exe_info:
+                    # 新版本 EXE 重命名为 Dayflow_new.exe
+                    dest = self.pending_dir / "Dayflow_new.exe"
+                else:
+                    dest = self.pending_dir / rel_path
+                    # 防止路径穿越
+                    if not dest.resolve().is_relative_to(pending_root):
+                        logger.warning(f"跳过非法路径: {info.filename}")
+                        continue
+                    
+                    # 同名依赖目录先整体删除，避免残留旧文件
+                    top_level = rel_path.split('/', 1)[0]
+                    if '/' in rel_path.rstrip('/') or info.is_dir():
+                        if top_level not in replaced_dirs:
+                            replaced_dirs.add(top_level)
+                            shutil.rmtree(self.pending_dir / top_level, ignore_errors=True)
+                
+                if info.is_dir():
+                    dest.mkdir(parents=True, exist_ok=True)
+                    continue
+                
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                with zf.open(info) as src, open(dest, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+        
+        logger.info(f"解压完成，找到 EXE: {self.pending_dir / 'Dayflow_new.exe'}")
         
         # 清理
         self.target_path.unlink(missing_ok=True)
-        shutil.rmtree(extract_dir, ignore_errors=True)
     
     def _save_update_info(self):
         """保存更新信息"""
@@ -312,10 +775,25 @@ class UpdateManager:
     """更新管理器 - 统一入口"""
     
     def __init__(self):
-        self.checker = UpdateChecker()
+        self._client: Optional[httpx.Client] = None
+        self._checker: Optional[UpdateChecker] = None
         self.downloader: Optional[UpdateDownloader] = None
         self.update_info: Optional[UpdateInfo] = None
         self.pending_dir = config.APP_DATA_DIR / "pending_update"
+        self._pending_cache: Optional[Tuple[int, dict]] = None
+    
+    def _get_client(self) -> httpx.Client:
+        """获取或创建共享的 HTTP 客户端（启动时只检查待安装更新，不需要网络）"""
+        if self._client is None or self._client.is_closed:
+            self._client = _create_http_client()
+        return self._client
+    
+    @property
+    def checker(self) -> UpdateChecker:
+        """版本检查器（与下载器共享 HTTP 客户端）"""
+        if self._checker is None:
+            self._checker = UpdateChecker(client=self._get_client())
+        return self._checker
     
     def check_update(self) -> UpdateInfo:
         """检查更新"""
@@ -336,7 +814,8 @@ class UpdateManager:
         self.downloader = UpdateDownloader(
             self.update_info,
             on_progress=on_progress,
-            on_complete=on_complete
+            on_complete=on_complete,
+            client=self._get_client()
         )
         self.downloader.start()
     
@@ -345,26 +824,42 @@ class UpdateManager:
         if self.downloader:
             self.downloader.cancel()
     
+    def close(self):
+        """关闭共享的 HTTP 客户端（退出时调用；之后再检查或下载会重新创建）"""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        self._checker = None
+    
+    def _read_pending_info(self) -> Optional[dict]:
+        """读取待安装更新信息，按文件修改时间缓存解析结果"""
+        info_path = self.pending_dir / 'update_info.json'
+        try:
+            mtime = info_path.stat().st_mtime_ns
+        except OSError:
+            return None
+        
+        if self._pending_cache is not None and self._pending_cache[0] == mtime:
+            return self._pending_cache[1]
+        
+        try:
+            info = _json_loads(info_path.read_bytes())
+        except Exception:
+            return None
+        if not isinstance(info, dict):
+            return None
+        
+        self._pending_cache = (mtime, info)
+        return info
+    
     def has_pending_update(self) -> bool:
         """检查是否有待安装的更新"""
-        info_path = self.pending_dir / 'update_info.json'
-        if info_path.exists():
-            try:
-                info = json.loads(info_path.read_text())
-                return info.get('ready', False)
-            except:
-                pass
-        return False
+        info = self._read_pending_info()
+        return info.get('ready', False) if info else False
     
     def get_pending_update_info(self) -> Optional[dict]:
         """获取待安装更新的信息"""
-        info_path = self.pending_dir / 'update_info.json'
-        if info_path.exists():
-            try:
-                return json.loads(info_path.read_text())
-            except:
-                pass
-        return None
+        return self._read_pending_info()
     
     def apply_update(self) -> bool:
         """
@@ -416,6 +911,7 @@ class UpdateManager:
         """清理待安装的更新"""
         if self.pending_dir.exists():
             shutil.rmtree(self.pending_dir, ignore_errors=True)
+        self._pending_cache = None
     
     @staticmethod
     def get_github_release_url() -> str:
@@ -3,7 +3,10 @@ Dayflow Windows - 窗口信息追踪模块
 使用 Windows API 获取当前活动窗口的进程名和标题
 """
 import logging
+import ntpath
+import sys
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 
 from i18n import _
@@ -20,6 +23,26 @@ except ImportError:
     WINDOWS_API_AVAILABLE = False
     logger.warning("win32gui/psutil 未安装，窗口追踪功能不可用")
 
+# 直接调用 QueryFullProcessImageNameW 获取进程路径（一次系统调用，psutil 作为回退）
+try:
+    import ctypes
+    from ctypes import wintypes
+    
+    _kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    _kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    _kernel32.OpenProcess.restype = wintypes.HANDLE
+    _kernel32.QueryFullProcessImageNameW.argtypes = (
+        wintypes.HANDLE, wintypes.DWORD, wintypes.LPWSTR, ctypes.POINTER(wintypes.DWORD)
+    )
+    _kernel32.QueryFullProcessImageNameW.restype = wintypes.BOOL
+    _kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+    _kernel32.CloseHandle.restype = wintypes.BOOL
+    KERNEL32_AVAILABLE = True
+except (ImportError, AttributeError, OSError):
+    KERNEL32_AVAILABLE = False
+
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
 
 @dataclass
 class WindowInfo:
@@ -36,6 +59,58 @@ class WindowInfo:
         return name
 
 
+def _query_process_name(pid: int) -> Optional[str]:
+    """通过 QueryFullProcessImageNameW 获取进程名，失败时返回 None"""
+    handle = _kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return None
+    try:
+        size = wintypes.DWORD(1024)
+        buffer = ctypes.create_unicode_buffer(size.value)
+        if not _kernel32.QueryFullProcessImageNameW(handle, 0, buffer, ctypes.byref(size)):
+            return None
+        return ntpath.basename(buffer.value)
+    finally:
+        _kernel32.CloseHandle(handle)
+
+
+@lru_cache(maxsize=256)
+def _cached_app_name(hwnd: int, pid: int) -> str:
+    """
+    获取窗口所属进程的进程名，失败时抛出 psutil 异常
+    
+    窗口随进程销毁，(hwnd, pid) 组合可以唯一确定一个进程实例，
+    因此按该组合缓存，轮询同一窗口时不再重复打开进程句柄。
+    lru_cache 不缓存异常，暂时失败的查询下次轮询会重新尝试。
+    """
+    if KERNEL32_AVAILABLE:
+        name = _query_process_name(pid)
+        if name:
+            return name
+    
+    return psutil.Process(pid).name()
+
+
+def _resolve_app_name(hwnd: int, pid: int) -> str:
+    """获取窗口所属进程的进程名，无法获取时返回 "Unknown"（不缓存）"""
+    try:
+        return _cached_app_name(hwnd, pid)
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return "Unknown"
+
+
+@lru_cache(maxsize=256)
+def _app_name_key(clean_name: str) -> str:
+    """进程名对应的映射表键（小写并驻留）"""
+    return sys.intern(clean_name.lower())
+
+
+@lru_cache(maxsize=256)
+def _title_app_name(clean_name: str) -> str:
+    """映射表未命中时的回退名称（首字母大写）"""
+    return clean_name.title()
+
+
 class WindowTracker:
     """
     窗口追踪器
@@ -88,7 +163,9 @@ class WindowTracker:
             "steam": "Steam",
             "epicgameslauncher": "Epic Games",
         }
-        self._app_name_map = {k: _(v) for k, v in self._app_name_map.items()}
+        self._app_name_map = {
+            sys.intern(k): sys.intern(_(v)) for k, v in self._app_name_map.items()
+        }
     
     @property
     def is_available(self) -> bool:
@@ -118,11 +195,7 @@ class WindowTracker:
             _, pid = win32process.GetWindowThreadProcessId(hwnd)
             
             # 获取进程名
-            try:
-                process = psutil.Process(pid)
-                app_name = process.name()
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                app_name = "Unknown"
+            app_name = _resolve_app_name(hwnd, pid)
             
             return WindowInfo(
                 app_name=app_name,
@@ -148,14 +221,13 @@ class WindowTracker:
             return "Unknown"
         
         # 获取干净的进程名（去掉 .exe）
-        clean_name = window_info.get_clean_app_name().lower()
+        clean_name = window_info.get_clean_app_name()
         
-        # 查找映射表
-        if clean_name in self._app_name_map:
-            return self._app_name_map[clean_name]
-        
-        # 返回原始名称（首字母大写）
-        return window_info.get_clean_app_name().title()
+        # 查找映射表，未命中时返回原始名称（首字母大写）
+        try:
+            return self._app_name_map[_app_name_key(clean_name)]
+        except KeyError:
+            return _title_app_name(clean_name)
 
 
 # 全局单例
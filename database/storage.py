@@ -6,10 +6,12 @@ import json
 import logging
 import threading
 from pathlib import Path
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 from contextlib import contextmanager
 
+import numpy as np
+
 import config
 from core.types import (
     VideoChunk, ChunkStatus,
@@ -292,19 +294,57 @@ class StorageManager:
     def get_cards_for_date(self, date: datetime) -> List[ActivityCard]:
         """获取指定日期的时间轴卡片"""
         start = date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end = date.replace(hour=23, minute=59, second=59, microsecond=999999)
-        
+        return self.get_cards_in_range(start, start + timedelta(days=1))
+    
+    def get_cards_in_range(self, start: datetime, end: datetime) -> List[ActivityCard]:
+        """获取 [start, end) 时间范围内开始的时间轴卡片，单次查询（走 start_time 索引）"""
         with self._get_connection() as conn:
             cursor = conn.execute(
                 """
                 SELECT * FROM timeline_cards 
-                WHERE start_time >= ? AND start_time <= ?
+                WHERE start_time >= ? AND start_time < ?
                 ORDER BY start_time ASC
                 """,
                 (start.isoformat(), end.isoformat())
             )
             return [self._row_to_card(row) for row in cursor.fetchall()]
     
+    def get_cards_arrays(self, start: datetime, end: datetime) -> Dict[str, np.ndarray]:
+        """
+        以列数组形式获取 [start, end) 时间范围内卡片的数值字段（用于统计汇总）
+        
+        只读取时间与评分列，不解析 app_sites/distractions JSON。
+        
+        Returns:
+            {durations: 时长（分钟）, scores: 效率评分, hours: 开始小时, days: 开始日期的序数}
+        """
+        with self._get_connection() as conn:
+            cursor = conn.execute(
+                """
+                SELECT start_time, end_time, productivity_score FROM timeline_cards 
+                WHERE start_time >= ? AND start_time < ?
+                ORDER BY start_time ASC
+                """,
+                (start.isoformat(), end.isoformat())
+            )
+            rows = cursor.fetchall()
+        
+        count = len(rows)
+        durations = np.zeros(count, dtype=np.float64)
+        scores = np.empty(count, dtype=np.float64)
+        hours = np.empty(count, dtype=np.int64)
+        days = np.empty(count, dtype=np.int64)
+        
+        for i, (start_time, end_time, score) in enumerate(rows):
+            start_dt = datetime.fromisoformat(start_time)
+            if end_time:
+                durations[i] = (datetime.fromisoformat(end_time) - start_dt).total_seconds() / 60
+            scores[i] = score
+            hours[i] = start_dt.hour
+            days[i] = start_dt.toordinal()
+        
+        return {"durations": durations, "scores": scores, "hours": hours, "days": days}
+    
     def get_recent_cards(self, limit: int = 10) -> List[ActivityCard]:
         """获取最近的卡片（用作上下文）"""
         with self._get_connection() as conn:
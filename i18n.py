@@ -10,18 +10,43 @@ Per-module translation files are located at:
 Example:
     core/analysis.py -> locales/ko_KR/LC_MESSAGES/core/analysis.mo
 """
+import array
+import ast
+import functools
+import os
+import pickle
+import struct
+import threading
 from pathlib import Path
-from typing import List, Optional, Dict
-
-from babel.support import Translations, NullTranslations
-from babel.messages.pofile import read_po
-from babel.messages.mofile import write_mo
+from typing import TYPE_CHECKING, Callable, List, Optional, Dict, Tuple
 
 import config
 
+# Babel is imported where it is used: the source language never needs it at runtime
+if TYPE_CHECKING:
+    from babel.support import NullTranslations
+
 # Global state
 _current_language = config.DEFAULT_LANGUAGE  # Track current language
 _locales_dir = Path(__file__).parent / "locales"
+# Parsed catalogs cached across restarts (the locales dir may be read-only or temporary when frozen)
+_catalog_cache_dir = config.APP_DATA_DIR / "i18n_cache"
+
+
+@functools.lru_cache(maxsize=256)
+def _load_translation(locales_dir: str, language: str, domain: str) -> "NullTranslations":
+    """
+    Load one domain's catalog.
+
+    Shared across translator instances, so switching back to a language
+    in the same session does not re-parse its .mo files.
+    """
+    from babel.support import Translations, NullTranslations
+
+    try:
+        return Translations.load(dirname=locales_dir, locales=[language], domain=domain)
+    except Exception:
+        return NullTranslations()
 
 
 class MultiDomainTranslator:
@@ -37,70 +62,167 @@ class MultiDomainTranslator:
     def __init__(self, language: str, locales_dir: Path):
         self.language = language
         self.locales_dir = locales_dir
-        self._cache: Dict[str, NullTranslations] = {}
-        self._load_all_translations()
-        
-    def _load_all_translations(self):
+        self._cache: Dict[str, "NullTranslations"] = {}
+        # Loaded domains flattened into one msgid -> msgstr map, so gettext is a single dict lookup
+        self._merged: Dict[str, str] = {}
+        # Domains found on disk but not loaded yet, in scan order (None until the locale
+        # tree is scanned); the source language has nothing to load
+        self._pending: Optional[Dict[str, None]] = {} if language == config.DEFAULT_LANGUAGE else None
+        self._load_lock = threading.Lock()
+        # (language, ((relative path, mtime_ns, size), ...)) of every scanned .mo file
+        self._signature: Optional[Tuple[str, Tuple[Tuple[str, int, int], ...]]] = None
+
+    def _pending_domains(self) -> Dict[str, None]:
         """
-        Pre-load all available .mo files for the current language.
+        Index the available domains on first use (caller holds the lock).
 
-        This ensures the translator has access to all translation domains.
+        If the merged catalog cached by a previous run still matches the
+        .mo files on disk, it is used as-is and nothing is left to load.
         """
-        # Find all .mo files for the current language
-        lang_dir = _locales_dir / self.language / 'LC_MESSAGES'
+        if self._pending is None:
+            domains = self._scan_domains()
+            cached = self._load_catalog_cache()
+            if cached is not None:
+                for msgid, msgstr in cached.items():
+                    self._merged.setdefault(msgid, msgstr)
+                self._pending = {}
+            else:
+                self._pending = dict.fromkeys(domains)
+        return self._pending
+
+    def _load_pending(self, domain: str):
+        """Load a not-yet-loaded domain (caller holds the lock)."""
+        if domain in self._pending:
+            # Only drop the domain once it is merged: an empty _pending means
+            # every translation is in _merged
+            self.get_translation(domain)
+            del self._pending[domain]
+            if not self._pending:
+                self._save_catalog_cache()
 
-        if not lang_dir.exists():
+    def _catalog_cache_path(self) -> Path:
+        return _catalog_cache_dir / f"{self.language}.pkl"
+
+    def _load_catalog_cache(self) -> Optional[Dict[str, str]]:
+        """Return the cached merged catalog if its signature matches, else None."""
+        if not self._signature:
+            return None
+        try:
+            with open(self._catalog_cache_path(), 'rb') as f:
+                signature, merged = pickle.load(f)
+        except Exception:
+            return None
+        return merged if signature == self._signature else None
+
+    def _save_catalog_cache(self):
+        """Store the fully merged catalog (translations only) for the next start."""
+        if not self._signature:
             return
+        path = self._catalog_cache_path()
+        tmp_path = path.with_suffix('.tmp')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                merged = {msgid: msgstr for msgid, msgstr in self._merged.items() if msgstr != msgid}
+                pickle.dump((self._signature, merged), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception:
+            pass
 
-        # Recursively find all .mo files
-        for mo_file in lang_dir.rglob('*.mo'):
-            # Convert file path to domain name
-            # e.g., locales/ko_KR/LC_MESSAGES/core/analysis.mo -> core/analysis
-            rel_path = mo_file.relative_to(lang_dir)
-            domain = str(rel_path.with_suffix('')).replace('\\', '/')
+    def _scan_domains(self) -> List[str]:
+        """
+        List all available .mo domains for the current language.
 
-            # Load the translation for this domain
-            self.get_translation(domain)
+        Only the directory listing is read; the .mo files are loaded on demand.
+        Also records the signature used to validate the catalog cache.
+        """
+        domains = []
+        files = []
+
+        # Find all .mo files for the current language
+        lang_dir = os.path.join(_locales_dir, self.language, 'LC_MESSAGES')
+
+        if not os.path.isdir(lang_dir):
+            return domains
+
+        # Iterative scandir walk; DirEntry carries the file type, so no extra stat per entry
+        prefix_len = len(lang_dir) + 1
+        stack = [lang_dir]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                entries = sorted(it, key=lambda e: e.name)
+
+            subdirs = []
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.name.endswith('.mo'):
+                    # Convert file path to domain name
+                    # e.g., locales/ko_KR/LC_MESSAGES/core/analysis.mo -> core/analysis
+                    domains.append(entry.path[prefix_len:-3].replace(os.sep, '/'))
+                    stat = entry.stat()
+                    files.append((entry.path[prefix_len:], stat.st_mtime_ns, stat.st_size))
+
+            # Pushed in reverse so directories are visited in sorted order
+            stack.extend(reversed(subdirs))
+
+        # Any added, removed, replaced or touched .mo file invalidates the cache
+        self._signature = (self.language, tuple(files))
+        return domains
 
     def get_translation(self, domain: str):
         """Get translation for a specific domain (module path)."""
         if domain not in self._cache:
-            try:
-                trans = Translations.load(
-                    dirname=str(self.locales_dir),
-                    locales=[self.language],
-                    domain=domain
-                )
-                self._cache[domain] = trans
-            except Exception:
-                self._cache[domain] = NullTranslations()
+            self._cache[domain] = _load_translation(str(self.locales_dir), self.language, domain)
+            self._merge(self._cache[domain])
 
         return self._cache[domain]
 
+    def _merge(self, trans: "NullTranslations"):
+        """
+        Add a domain's non-identity translations to the merged lookup.
+
+        Domains are always loaded in scan order, so domains loaded earlier
+        win, matching the previous "first domain with a translation" behaviour.
+        """
+        for msgid, msgstr in getattr(trans, '_catalog', {}).items():
+            # Skip the header entry and plural keys (stored as tuples)
+            if isinstance(msgid, str) and msgid and msgstr and msgstr != msgid:
+                self._merged.setdefault(msgid, msgstr)
+
     def gettext(self, message: str) -> str:
         """
-        Translate a message by trying all loaded domains.
+        Translate a message using the loaded domains.
 
-        Since we can't know which module the string comes from at runtime
-        without inspecting the call stack, we try all loaded domains.
-        The first non-identity translation wins.
+        Domains are loaded on demand, in scan order, until one of them
+        translates the message. The loaded domains are therefore always a
+        prefix of the scan order, and the first domain with a non-identity
+        translation wins no matter which module asks first.
+
+        Once every domain is loaded, untranslated messages are cached as
+        identity entries, so repeated misses are a plain dict hit as well.
+        The identity entry is only added under the lock after loading has
+        finished, so it can never shadow a translation still being merged.
         """
-        # If Chinese, no translation needed
-        if self.language == 'zh_CN':
-            return message
+        translated = self._merged.get(message)
+        if translated is not None:
+            return translated
 
-        # Try all cached translations
-        for domain, trans in self._cache.items():
-            translated = trans.gettext(message)
-            if translated != message:
-                return translated
+        with self._load_lock:
+            for domain in list(self._pending_domains()):
+                self._load_pending(domain)
+                translated = self._merged.get(message)
+                if translated is not None:
+                    return translated
 
-        # No translation found, return original
-        return message
+            return self._merged.setdefault(message, message)
 
 
 # Global translator instance
 _translator: Optional[MultiDomainTranslator] = None
+# Bound dict.get of the active translator's merged lookup; str() for the
+# source language, which returns the message itself without a Python frame
+_lookup: Callable[[str], Optional[str]] = str
 
 
 def _(message: str) -> str:
@@ -112,11 +234,10 @@ def _(message: str) -> str:
 
         text = _("中文文本")
     """
-    global _translator
-
-    if _translator is None or _current_language == 'zh_CN':
-        return message
-
+    translated = _lookup(message)
+    if translated is not None:
+        return translated
+    # Miss: let the translator load further domains on demand
     return _translator.gettext(message)
 
 def load_translations(language: str) -> Optional[MultiDomainTranslator]:
@@ -151,7 +272,7 @@ def init_i18n(language: Optional[str] = None, storage=None) -> None:
                  Otherwise defaults to simplified Chinese
         storage: Storage instance to read language preference from
     """
-    global _translator, _current_language
+    global _translator, _current_language, _lookup
 
     # Get language from storage if not specified
     if language is None and storage is not None:
@@ -160,8 +281,17 @@ def init_i18n(language: Optional[str] = None, storage=None) -> None:
         except Exception:
             language = config.DEFAULT_LANGUAGE
 
+    # Source language: nothing to load, _() returns messages unchanged
+    if language is None or language == config.DEFAULT_LANGUAGE:
+        _translator = None
+        _current_language = config.DEFAULT_LANGUAGE
+        _lookup = str
+        return
+
     _translator = load_translations(language)
     _current_language = language
+    # Bind once here so a hit in _() is a single C-level call
+    _lookup = _translator._merged.get if _translator is not None else str
 
 
 def get_current_language() -> str:
@@ -170,29 +300,135 @@ def get_current_language() -> str:
 
 
 def get_supported_languages() -> List[str]:
-    ret = []
-    ret.append(config.DEFAULT_LANGUAGE)
-    for lang_dir in _locales_dir.iterdir():
-        lang = lang_dir.name
-        if (lang_dir.is_dir() and lang not in ret):
-            ret.append(lang)
+    ret = [config.DEFAULT_LANGUAGE]
+    # DirEntry.is_dir() uses the file type from the directory listing, no extra stat per entry
+    with os.scandir(_locales_dir) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False) and entry.name not in ret:
+                ret.append(entry.name)
+
+    return ret
+
+def _parse_po(po_file: Path) -> Optional[Dict[str, str]]:
+    """
+    Parse a simple .po file into {msgid: msgstr}, in the spirit of CPython's msgfmt.py.
+
+    Fuzzy and untranslated entries are dropped like Babel's write_mo does.
+    Returns None when the file uses msgctxt or plural forms, which are left
+    to Babel.
+    """
+    messages: Dict[str, str] = {}
+    msgid = msgstr = None
+    section = None
+    fuzzy = False
+
+    def add():
+        # The header (msgid "") is always kept
+        if msgid is not None and (msgid == '' or (msgstr and not fuzzy)):
+            messages[msgid] = msgstr
+
+    with open(po_file, encoding='utf-8') as fs:
+        for line in fs:
+            line = line.strip()
+            if not line:
+                continue
+
+            if line.startswith('#'):
+                # A comment after a msgstr starts the next entry
+                if section == 'msgstr':
+                    add()
+                    msgid = msgstr = None
+                    section = None
+                    fuzzy = False
+                if line.startswith('#,') and 'fuzzy' in line:
+                    fuzzy = True
+                continue
+
+            if line.startswith(('msgctxt', 'msgid_plural', 'msgstr[')):
+                return None
+
+            if line.startswith('msgid '):
+                if section == 'msgstr':
+                    add()
+                    fuzzy = False
+                section = 'msgid'
+                msgid, msgstr = ast.literal_eval(line[6:]), None
+            elif line.startswith('msgstr '):
+                section = 'msgstr'
+                msgstr = ast.literal_eval(line[7:])
+            elif line.startswith('"'):
+                # Continuation line
+                if section == 'msgid':
+                    msgid += ast.literal_eval(line)
+                elif section == 'msgstr':
+                    msgstr += ast.literal_eval(line)
+
+    if section == 'msgstr':
+        add()
+    # The file is read and written as UTF-8; declare it when there is no header,
+    # otherwise gettext cannot decode the catalog (Babel always writes one)
+    messages.setdefault('', 'Content-Type: text/plain; charset=UTF-8\n')
+    return messages
+
+
+def _write_mo(mo_file: Path, messages: Dict[str, str]):
+    """Write {msgid: msgstr} as a GNU .mo file (no hash table, keys sorted)."""
+    keys = sorted(messages)
+    ids = strs = b''
+    offsets = []
+    for key in keys:
+        msgid = key.encode('utf-8')
+        msgstr = messages[key].encode('utf-8')
+        offsets.append((len(ids), len(msgid), len(strs), len(msgstr)))
+        ids += msgid + b'\0'
+        strs += msgstr + b'\0'
+
+    keystart = 7 * 4 + 16 * len(keys)
+    valuestart = keystart + len(ids)
+    koffsets = []
+    voffsets = []
+    for o1, l1, o2, l2 in offsets:
+        koffsets += [l1, o1 + keystart]
+        voffsets += [l2, o2 + valuestart]
+
+    with open(mo_file, 'wb') as fs:
+        fs.write(struct.pack(
+            'Iiiiiii',
+            0x950412de,              # magic
+            0,                       # version
+            len(keys),               # number of entries
+            7 * 4,                   # start of key index
+            7 * 4 + len(keys) * 8,   # start of value index
+            0, 0                     # size and offset of hash table
+        ))
+        fs.write(array.array('i', koffsets + voffsets).tobytes())
+        fs.write(ids)
+        fs.write(strs)
 
-    return list(ret)
 
 def compile_po(po_file: Path):
     """
     Compile .po files to .mo files in the specified directory.
 
+    Plain catalogs are compiled directly; files using msgctxt or plural
+    forms go through Babel's catalog model.
+
     Args:
         path: Path to the directory containing .po files
     """
     
-    po_file_rel = po_file.relative_to(_locales_dir)
     mo_file = po_file.with_suffix('.mo')
+
+    messages = _parse_po(po_file)
+    if messages is not None:
+        _write_mo(mo_file, messages)
+        return
     
-    
+    from babel.messages.pofile import read_po
+    from babel.messages.mofile import write_mo
+
     # po_file: {lang}/LC_MESSAGES/...
-    locale = po_file_rel.parts[0]
+    locale = po_file.relative_to(_locales_dir).parts[0]
     
     with open(po_file, 'rb') as fs:
         catalog = read_po(fs, locale)
@@ -63,6 +63,8 @@ import shutil
 import zipfile
 import argparse
 import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -76,6 +78,18 @@ GITHUB_TOKEN = os.getenv("GITHUB_TOKEN", "")
 REPO = config.GITHUB_REPO
 VERSION = config.VERSION
 
+# 已经是压缩格式的文件，再次 deflate 几乎不减小体积，直接存储
+STORED_SUFFIXES = {'.zip', '.pyz', '.png', '.jpg', '.jpeg', '.gif', '.woff2'}
+
+# 打包 ZIP 时后台预读的文件数（限制内存占用）
+ZIP_READ_AHEAD = 4
+
+# 超过该大小的文件不预读，由 ZipFile.write 分块流式写入，预读占用的内存不超过 ZIP_READ_AHEAD 倍该值
+ZIP_READ_AHEAD_MAX_SIZE = 8 * 1024 * 1024
+
+# 上传时每次从磁盘读取的块大小（httpx 默认按 64KB 读取文件）
+UPLOAD_CHUNK_SIZE = 1 << 20
+
 
 def print_header(text: str):
     """打印标题"""
@@ -99,6 +113,34 @@ def run_build() -> bool:
     return result.returncode == 0
 
 
+def iter_file_contents(files: list):
+    """
+    按顺序返回 (文件, 内容)，后台线程提前读取后面的文件
+    
+    读盘与主线程的 deflate 压缩（zlib 会释放 GIL）重叠进行。
+    大文件不预读，内容返回 None，由调用方流式写入。
+    """
+    with ThreadPoolExecutor(max_workers=ZIP_READ_AHEAD) as executor:
+        def read_ahead(file: Path):
+            if file.stat().st_size > ZIP_READ_AHEAD_MAX_SIZE:
+                return None
+            return executor.submit(file.read_bytes)
+        
+        pending = deque()
+        remaining = iter(files)
+        for file in remaining:
+            pending.append((file, read_ahead(file)))
+            if len(pending) >= ZIP_READ_AHEAD:
+                break
+        
+        while pending:
+            file, future = pending.popleft()
+            next_file = next(remaining, None)
+            if next_file is not None:
+                pending.append((next_file, read_ahead(next_file)))
+            yield file, future.result() if future is not None else None
+
+
 def create_zip() -> Path:
     """创建 ZIP 压缩包"""
     print_header("📦 创建 ZIP 压缩包")
@@ -119,11 +161,17 @@ def create_zip() -> Path:
     print(f"  压缩目录: {dist_dir}")
     print(f"  输出文件: {zip_path}")
     
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for file in dist_dir.rglob('*'):
-            if file.is_file():
-                arcname = f"Dayflow/{file.relative_to(dist_dir)}"
-                zf.write(file, arcname)
+    # 已压缩的文件直接存储，其余文件用最低压缩级别，速度快得多，体积相差不大
+    files = [file for file in dist_dir.rglob('*') if file.is_file()]
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for file, data in iter_file_contents(files):
+            arcname = f"Dayflow/{file.relative_to(dist_dir)}"
+            compress_type = zipfile.ZIP_STORED if file.suffix.lower() in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+            if data is None:
+                zf.write(file, arcname, compress_type=compress_type, compresslevel=1)
+            else:
+                zinfo = zipfile.ZipInfo.from_file(file, arcname)
+                zf.writestr(zinfo, data, compress_type=compress_type, compresslevel=1)
     
     size_mb = zip_path.stat().st_size / 1024 / 1024
     print(f"  文件大小: {size_mb:.1f} MB")
@@ -189,11 +237,11 @@ def create_release(zip_path: Path, notes: str = "") -> bool:
     }
     
     try:
-        with httpx.Client(timeout=60) as client:
+        # 所有请求共用一个 HTTP/2 客户端，复用到 api.github.com 的 TLS 连接
+        with httpx.Client(http2=True, timeout=60, headers=headers) as client:
             # 检查 Release 是否已存在
             resp = client.get(
-                f"https://api.github.com/repos/{REPO}/releases/tags/{tag}",
-                headers=headers
+                f"https://api.github.com/repos/{REPO}/releases/tags/{tag}"
             )
             
             if resp.status_code == 200:
@@ -205,23 +253,26 @@ def create_release(zip_path: Path, notes: str = "") -> bool:
                 # 更新 Release
                 resp = client.patch(
                     f"https://api.github.com/repos/{REPO}/releases/{release_id}",
-                    headers=headers,
                     json={"body": notes}
                 )
                 resp.raise_for_status()
                 
-                # 删除旧的资产
-                for asset in release.get("assets", []):
+                # 删除旧的资产（并发请求，在同一连接上多路复用）
+                assets = release.get("assets", [])
+                for asset in assets:
                     print(f"  删除旧资产: {asset['name']}")
-                    client.delete(
-                        f"https://api.github.com/repos/{REPO}/releases/assets/{asset['id']}",
-                        headers=headers
-                    )
+                if assets:
+                    with ThreadPoolExecutor(max_workers=min(len(assets), 8)) as executor:
+                        list(executor.map(
+                            lambda asset: client.delete(
+                                f"https://api.github.com/repos/{REPO}/releases/assets/{asset['id']}"
+                            ),
+                            assets
+                        ))
             else:
                 # 创建新 Release
                 resp = client.post(
                     f"https://api.github.com/repos/{REPO}/releases",
-                    headers=headers,
                     json=release_data
                 )
                 resp.raise_for_status()
@@ -234,15 +285,17 @@ def create_release(zip_path: Path, notes: str = "") -> bool:
             
             upload_url = f"https://uploads.github.com/repos/{REPO}/releases/{release_id}/assets"
             
+            # 直接从文件流式上传，不把整个 ZIP 读入内存；
+            # 显式给出 Content-Length，GitHub 上传接口不接受分块传输
             with open(zip_path, 'rb') as f:
                 resp = client.post(
                     upload_url,
                     params={"name": zip_path.name},
                     headers={
-                        **headers,
-                        "Content-Type": "application/zip"
+                        "Content-Type": "application/zip",
+                        "Content-Length": str(zip_path.stat().st_size)
                     },
-                    content=f.read(),
+                    content=iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""),
                     timeout=300  # 上传大文件需要更长超时
                 )
                 resp.raise_for_status()
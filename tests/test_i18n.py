@@ -0,0 +1,287 @@
+"""
+Tests for i18n catalog compilation and loading
+
+Checks that the built-in .po -> .mo compiler produces the same catalog as
+Babel, that domains are loaded lazily without changing precedence, and
+that the merged catalog cache follows the .mo files on disk.
+"""
+import gettext
+import io
+import os
+import pickle
+import threading
+import tempfile
+from pathlib import Path
+
+import pytest
+from babel.messages.catalog import Catalog
+from babel.messages.mofile import write_mo
+from babel.messages.pofile import read_po, write_po
+from hypothesis import given, settings, strategies as st
+
+import i18n
+
+
+FIXTURE_PO = r'''# Dayflow test catalog
+msgid ""
+msgstr ""
+"Project-Id-Version: Dayflow 1.0\n"
+"Language: ko_KR\n"
+"MIME-Version: 1.0\n"
+"Content-Type: text/plain; charset=UTF-8\n"
+"Content-Transfer-Encoding: 8bit\n"
+"Plural-Forms: nplurals=1; plural=0;\n"
+
+#: core/updater.py:10
+msgid "工作"
+msgstr "작업"
+
+msgid "第一行\n第二行\t制表符"
+msgstr "첫 줄\n둘째 줄\t탭"
+
+msgid "引号 \"quoted\" 与反斜杠 \\ 结尾"
+msgstr "따옴표 \"quoted\" 와 백슬래시 \\ 끝"
+
+msgid ""
+"多行"
+"消息"
+msgstr ""
+"여러 줄 "
+"메시지"
+
+#, fuzzy
+msgid "模糊条目"
+msgstr "퍼지 항목"
+
+#, python-format, fuzzy
+msgid "模糊 {value}"
+msgstr "퍼지 {value}"
+
+msgid "未翻译"
+msgstr ""
+
+#~ msgid "已废弃"
+#~ msgstr "폐기됨"
+
+msgid "最后一条"
+msgstr "마지막"
+'''
+
+CONTEXT_PO = r'''msgid ""
+msgstr ""
+"Language: ko_KR\n"
+"Content-Type: text/plain; charset=UTF-8\n"
+
+msgctxt "menu"
+msgid "打开"
+msgstr "열기"
+
+msgid "关闭"
+msgstr "닫기"
+'''
+
+
+def _catalog(mo_bytes: bytes) -> dict:
+    """Parsed .mo entries without the header (Babel rewrites header fields)"""
+    catalog = dict(gettext.GNUTranslations(io.BytesIO(mo_bytes))._catalog)
+    catalog.pop('', None)
+    return catalog
+
+
+def _babel_mo(po_text: str) -> bytes:
+    buf = io.BytesIO()
+    write_mo(buf, read_po(io.BytesIO(po_text.encode('utf-8')), 'ko_KR'))
+    return buf.getvalue()
+
+
+@pytest.fixture
+def locales_dir(tmp_path, monkeypatch):
+    """Temporary locales tree used in place of the application's"""
+    monkeypatch.setattr(i18n, '_locales_dir', tmp_path)
+    monkeypatch.setattr(i18n, '_catalog_cache_dir', tmp_path / 'cache')
+    i18n._load_translation.cache_clear()
+    yield tmp_path
+    i18n._load_translation.cache_clear()
+
+
+def _write_po(locales_dir: Path, domain: str, text: str) -> Path:
+    po_file = locales_dir / 'ko_KR' / 'LC_MESSAGES' / f'{domain}.po'
+    po_file.parent.mkdir(parents=True, exist_ok=True)
+    po_file.write_text(text, encoding='utf-8')
+    return po_file
+
+
+# ============================================================================
+# compile_po: built-in compiler matches Babel
+# ============================================================================
+
+def test_compile_po_matches_babel(locales_dir):
+    po_file = _write_po(locales_dir, 'core/updater', FIXTURE_PO)
+
+    i18n.compile_po(po_file)
+
+    catalog = _catalog(po_file.with_suffix('.mo').read_bytes())
+    assert catalog == _catalog(_babel_mo(FIXTURE_PO))
+    assert catalog["第一行\n第二行\t制表符"] == "첫 줄\n둘째 줄\t탭"
+    assert catalog['引号 "quoted" 与反斜杠 \\ 结尾'] == '따옴표 "quoted" 와 백슬래시 \\ 끝'
+    assert catalog["多行消息"] == "여러 줄 메시지"
+    assert catalog["最后一条"] == "마지막"
+    # Fuzzy, untranslated and obsolete entries are not compiled
+    for msgid in ("模糊条目", "模糊 {value}", "未翻译", "已废弃"):
+        assert msgid not in catalog
+
+
+def test_compile_po_keeps_header(locales_dir):
+    po_file = _write_po(locales_dir, 'main', FIXTURE_PO)
+
+    i18n.compile_po(po_file)
+
+    translations = gettext.GNUTranslations(io.BytesIO(po_file.with_suffix('.mo').read_bytes()))
+    assert translations.info()['language'] == 'ko_KR'
+    assert translations.charset() == 'UTF-8'
+
+
+def test_compile_po_falls_back_to_babel_for_msgctxt(locales_dir):
+    po_file = _write_po(locales_dir, 'ui/main_window', CONTEXT_PO)
+
+    assert i18n._parse_po(po_file) is None
+    i18n.compile_po(po_file)
+
+    catalog = _catalog(po_file.with_suffix('.mo').read_bytes())
+    assert catalog == _catalog(_babel_mo(CONTEXT_PO))
+    assert catalog["menu\x04打开"] == "열기"
+
+
+message_text = st.text(
+    alphabet=st.characters(blacklist_categories=('Cs', 'Cc')) | st.sampled_from('\n\t"\\'),
+    min_size=1,
+    max_size=120,
+)
+
+
+@settings(max_examples=100, deadline=None)
+@given(messages=st.dictionaries(message_text, message_text, min_size=1, max_size=10))
+def test_property_compile_po_round_trip(messages):
+    """
+    For any catalog written by Babel (escaping and line wrapping included),
+    the built-in compiler produces the same .mo entries as Babel's write_mo.
+    """
+    catalog = Catalog(locale='ko_KR')
+    for msgid, msgstr in messages.items():
+        catalog.add(msgid, msgstr)
+    buf = io.BytesIO()
+    write_po(buf, catalog)
+    po_text = buf.getvalue().decode('utf-8')
+
+    # hypothesis runs many examples per test, so no function-scoped tmp_path here
+    with tempfile.TemporaryDirectory() as tmp:
+        po_file = Path(tmp) / 'test.po'
+        po_file.write_text(po_text, encoding='utf-8')
+        mo_file = po_file.with_suffix('.mo')
+        i18n._write_mo(mo_file, i18n._parse_po(po_file))
+        mo_bytes = mo_file.read_bytes()
+
+    assert _catalog(mo_bytes) == _catalog(_babel_mo(po_text))
+
+
+# ============================================================================
+# MultiDomainTranslator: lazy loading and the merged catalog cache
+# ============================================================================
+
+def test_first_domain_in_scan_order_wins(locales_dir):
+    # "core/a" sorts before "ui/b"; both translate the same msgid differently
+    for domain, msgstr in (('core/a', '첫째'), ('ui/b', '둘째')):
+        po_file = _write_po(locales_dir, domain, f'msgid "共享"\nmsgstr "{msgstr}"\n\nmsgid "{domain}"\nmsgstr "{domain}!"\n')
+        i18n.compile_po(po_file)
+
+    # Asking for a ui/b-only string first must not change the precedence
+    translator = i18n.MultiDomainTranslator('ko_KR', locales_dir)
+    assert translator.gettext("ui/b") == "ui/b!"
+    assert translator.gettext("共享") == "첫째"
+    assert translator.gettext("不存在") == "不存在"
+
+
+def test_lookup_during_last_domain_load_is_not_cached_as_identity(locales_dir):
+    po_file = _write_po(locales_dir, 'main', 'msgid "工作"\nmsgstr "작업"\n')
+    i18n.compile_po(po_file)
+
+    translator = i18n.MultiDomainTranslator('ko_KR', locales_dir)
+    load = translator.get_translation
+    results = []
+    other = threading.Thread(target=lambda: results.append(translator.gettext("工作")))
+
+    def load_with_concurrent_lookup(domain):
+        # Another thread looks the message up while the only domain is being merged
+        other.start()
+        other.join(0.2)
+        return load(domain)
+
+    translator.get_translation = load_with_concurrent_lookup
+    assert translator.gettext("工作") == "작업"
+    other.join()
+
+    assert results == ["작업"]
+    assert translator._merged["工作"] == "작업"
+
+
+def test_catalog_cache_excludes_identity_entries(locales_dir):
+    po_file = _write_po(locales_dir, 'main', 'msgid "工作"\nmsgstr "작업"\n')
+    i18n.compile_po(po_file)
+
+    translator = i18n.MultiDomainTranslator('ko_KR', locales_dir)
+    assert translator.gettext("不存在") == "不存在"
+    assert translator._merged["不存在"] == "不存在"
+    translator._save_catalog_cache()
+
+    with open(locales_dir / 'cache' / 'ko_KR.pkl', 'rb') as f:
+        _, merged = pickle.load(f)
+    assert merged == {"工作": "작업"}
+
+
+def test_catalog_cache_follows_mo_files(locales_dir):
+    po_file = _write_po(locales_dir, 'main', 'msgid "工作"\nmsgstr "작업"\n')
+    i18n.compile_po(po_file)
+
+    translator = i18n.MultiDomainTranslator('ko_KR', locales_dir)
+    assert translator.gettext("工作") == "작업"
+    assert translator.gettext("不存在") == "不存在"  # loads everything, writes the cache
+    assert (locales_dir / 'cache' / 'ko_KR.pkl').exists()
+
+    # A second translator is served from the cache without loading any .mo
+    i18n._load_translation.cache_clear()
+    cached = i18n.MultiDomainTranslator('ko_KR', locales_dir)
+    assert cached.gettext("工作") == "작업"
+    assert i18n._load_translation.cache_info().currsize == 0
+
+    # Recompiling the catalog invalidates the cache
+    po_file.write_text('msgid "工作"\nmsgstr "업무"\n', encoding='utf-8')
+    i18n.compile_po(po_file)
+    mo_file = po_file.with_suffix('.mo')
+    stat = mo_file.stat()
+    os.utime(mo_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    i18n._load_translation.cache_clear()
+
+    reloaded = i18n.MultiDomainTranslator('ko_KR', locales_dir)
+    assert reloaded.gettext("工作") == "업무"
+
+
+def test_catalog_cache_notices_older_file_changes(locales_dir):
+    # Replacing a .mo that is not the newest one keeps the file count and the
+    # newest mtime, but must still invalidate the cache
+    old_po = _write_po(locales_dir, 'core/a', 'msgid "工作"\nmsgstr "작업"\n')
+    new_po = _write_po(locales_dir, 'ui/b', 'msgid "学习"\nmsgstr "학습"\n')
+    for po_file in (old_po, new_po):
+        i18n.compile_po(po_file)
+    old_mo, new_mo = old_po.with_suffix('.mo'), new_po.with_suffix('.mo')
+    os.utime(old_mo, ns=(0, new_mo.stat().st_mtime_ns - 2_000_000_000))
+
+    translator = i18n.MultiDomainTranslator('ko_KR', locales_dir)
+    assert translator.gettext("不存在") == "不存在"  # loads everything, writes the cache
+
+    old_po.write_text('msgid "工作"\nmsgstr "업무 처리"\n', encoding='utf-8')
+    i18n.compile_po(old_po)
+    os.utime(old_mo, ns=(0, new_mo.stat().st_mtime_ns - 1_000_000_000))
+    i18n._load_translation.cache_clear()
+
+    reloaded = i18n.MultiDomainTranslator('ko_KR', locales_dir)
+    assert reloaded.gettext("工作") == "업무 처리"
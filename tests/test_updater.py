@@ -0,0 +1,271 @@
+"""
+Tests for the updater's version parsing and multi-mirror downloader
+
+Downloads run against httpx.MockTransport mirrors; no network access.
+"""
+import gzip
+import os
+import re
+import threading
+import time
+
+import httpx
+import pytest
+from hypothesis import given, settings, strategies as st
+from packaging.version import Version
+
+import core.updater as updater
+from core.updater import UpdateChecker, UpdateDownloader, UpdateInfo
+
+
+# ============================================================================
+# _parse_version / _compare_versions
+# ============================================================================
+
+@pytest.mark.parametrize("tag, expected", [
+    ("v1.2.3", "1.2.3"),
+    ("V2.0", "2.0"),
+    ("1.2.0-rc1", "1.2.0rc1"),
+    ("1.5.1-beta2", "1.5.1b2"),
+    # Fallback for tags that are not PEP 440
+    ("Dayflow-1.2.3", "1.2.3"),
+    ("1.2.3-hotfix", "1.2.3"),
+    ("release-2", "2.0.0"),
+])
+def test_parse_version(tag: str, expected: str):
+    assert UpdateChecker._parse_version(tag) == Version(expected)
+
+
+def test_parse_version_unparsable():
+    assert UpdateChecker._parse_version("latest") is None
+
+
+def test_parse_version_ordering():
+    tags = ["v1.10.0", "1.2.0", "v1.2.0-rc1", "1.2.0a1", "Dayflow-1.2.1", "1.9.9", "v1.2.0-beta2"]
+    ordered = sorted(tags, key=UpdateChecker._parse_version)
+    assert ordered == ["1.2.0a1", "v1.2.0-beta2", "v1.2.0-rc1", "1.2.0", "Dayflow-1.2.1", "1.9.9", "v1.10.0"]
+
+
+@settings(max_examples=100)
+@given(
+    a=st.tuples(st.integers(0, 50), st.integers(0, 50), st.integers(0, 50)),
+    b=st.tuples(st.integers(0, 50), st.integers(0, 50), st.integers(0, 50)),
+)
+def test_property_compare_versions_matches_tuple_order(a, b):
+    """For any two x.y.z tags, _compare_versions agrees with numeric tuple order"""
+    checker = UpdateChecker()
+    expected = (a > b) - (a < b)
+    assert checker._compare_versions("v%d.%d.%d" % a, "%d.%d.%d" % b) == expected
+
+
+# ============================================================================
+# UpdateDownloader: range splitting and fallback
+# ============================================================================
+
+PAYLOAD = os.urandom(3 * 1024 * 1024 + 12345)
+
+
+class SlowStream(httpx.SyncByteStream):
+    """Response body served in small pieces with a delay between them"""
+
+    def __init__(self, body: bytes, delay: float, served: list):
+        self.body = body
+        self.delay = delay
+        self.served = served
+
+    def __iter__(self):
+        for offset in range(0, len(self.body), 64 * 1024):
+            time.sleep(self.delay)
+            piece = self.body[offset:offset + 64 * 1024]
+            self.served.append(len(piece))
+            yield piece
+
+
+class Mirrors:
+    """Mock mirrors keyed by host; records every GET"""
+
+    def __init__(self, no_range=(), failing=(), dead=(), gzip_ranges=(), failing_starts=(), delay=0.0):
+        self.no_range = set(no_range)
+        self.failing = set(failing)
+        self.dead = set(dead)
+        self.gzip_ranges = set(gzip_ranges)
+        self.failing_starts = set(failing_starts)
+        self.delay = delay
+        self.requests = []
+        self.served = []
+        self.lock = threading.Lock()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if host in self.dead:
+            return httpx.Response(404)
+        if request.method == "HEAD":
+            return httpx.Response(200, headers={"content-length": str(len(PAYLOAD))})
+
+        byte_range = request.headers.get("range")
+        with self.lock:
+            self.requests.append((host, byte_range, request.headers.get("accept-encoding")))
+        if host in self.failing:
+            return httpx.Response(500)
+
+        if byte_range and host not in self.no_range:
+            start, end = map(int, re.match(r"bytes=(\d+)-(\d+)", byte_range).groups())
+            if start in self.failing_starts:
+                return httpx.Response(500)
+            body = PAYLOAD[start:end + 1]
+            headers = {}
+            if host in self.gzip_ranges:
+                body = gzip.compress(body)
+                headers["content-encoding"] = "gzip"
+            headers["content-length"] = str(len(body))
+            stream = SlowStream(body, self.delay, self.served) if self.delay else httpx.ByteStream(body)
+            return httpx.Response(206, stream=stream, headers=headers)
+        return httpx.Response(200, stream=httpx.ByteStream(PAYLOAD), headers={"content-length": str(len(PAYLOAD))})
+
+    def ranges(self):
+        return [r for r in self.requests if r[1]]
+
+    def full_gets(self):
+        return [r for r in self.requests if not r[1]]
+
+
+@pytest.fixture
+def make_downloader(tmp_path, monkeypatch):
+    """Build an UpdateDownloader that writes under tmp_path and talks to mock mirrors"""
+    monkeypatch.setattr(updater, "DOWNLOAD_MIRRORS", [
+        "https://a.example/{filename}",
+        "https://b.example/{filename}",
+        "https://c.example/{filename}",
+    ])
+
+    def make(mirrors: Mirrors):
+        transport = httpx.MockTransport(mirrors)
+        monkeypatch.setattr(updater, "_create_range_client", lambda connections: httpx.Client(transport=transport))
+        results = []
+        downloader = UpdateDownloader(
+            UpdateInfo(has_update=True, latest_version="9.9.9", filename="Dayflow.exe"),
+            on_complete=lambda success, message: results.append((success, message)),
+            client=httpx.Client(transport=transport),
+        )
+        downloader.pending_dir = tmp_path / "pending_update"
+        downloader.target_path = downloader.pending_dir / "Dayflow_new.exe"
+        downloader.latency_cache_path = tmp_path / "mirror_latency.json"
+        return downloader, results
+
+    return make
+
+
+def test_parallel_download_splits_into_contiguous_ranges(make_downloader):
+    mirrors = Mirrors()
+    downloader, results = make_downloader(mirrors)
+
+    downloader._download()
+
+    assert results == [(True, "")]
+    assert downloader.target_path.read_bytes() == PAYLOAD
+    assert not mirrors.full_gets()
+
+    # The ranges cover the file exactly once, are spread over every mirror,
+    # and ask for raw bytes
+    spans = sorted(tuple(map(int, r[1][len("bytes="):].split("-"))) for r in mirrors.ranges())
+    assert spans[0][0] == 0 and spans[-1][1] == len(PAYLOAD) - 1
+    assert all(prev[1] + 1 == cur[0] for prev, cur in zip(spans, spans[1:]))
+    assert all(end - start + 1 >= updater.RANGE_MIN_SIZE for start, end in spans[:-1])
+    assert {r[0] for r in mirrors.ranges()} == {"a.example", "b.example", "c.example"}
+    assert {r[2] for r in mirrors.ranges()} == {"identity"}
+
+
+def test_parallel_download_retries_failed_range_on_other_mirror(make_downloader):
+    mirrors = Mirrors(failing={"b.example"})
+    downloader, results = make_downloader(mirrors)
+
+    downloader._download()
+
+    assert results == [(True, "")]
+    assert downloader.target_path.read_bytes() == PAYLOAD
+    assert not mirrors.full_gets()
+
+
+def test_parallel_download_skips_dead_mirror(make_downloader):
+    mirrors = Mirrors(dead={"a.example"})
+    downloader, results = make_downloader(mirrors)
+
+    downloader._download()
+
+    assert results == [(True, "")]
+    assert downloader.target_path.read_bytes() == PAYLOAD
+    assert "a.example" not in {r[0] for r in mirrors.requests}
+
+
+@pytest.mark.parametrize("mirrors", [
+    Mirrors(no_range={"b.example"}),
+    Mirrors(gzip_ranges={"c.example"}),
+], ids=["range-not-supported", "encoded-range"])
+def test_falls_back_to_single_mirror_download(make_downloader, mirrors):
+    downloader, results = make_downloader(mirrors)
+
+    downloader._download()
+
+    assert results == [(True, "")]
+    assert downloader.target_path.read_bytes() == PAYLOAD
+    assert mirrors.full_gets()
+    assert not downloader.target_path.with_suffix(".tmp").exists()
+
+
+def test_small_file_is_downloaded_from_one_mirror(make_downloader, monkeypatch):
+    monkeypatch.setattr(updater, "RANGE_MIN_SIZE", len(PAYLOAD))
+    mirrors = Mirrors()
+    downloader, results = make_downloader(mirrors)
+
+    downloader._download()
+
+    assert results == [(True, "")]
+    assert downloader.target_path.read_bytes() == PAYLOAD
+    assert not mirrors.ranges()
+    assert len(mirrors.full_gets()) >= 1
+
+
+def test_all_mirrors_failing_reports_error(make_downloader):
+    mirrors = Mirrors(failing={"a.example", "b.example", "c.example"})
+    downloader, results = make_downloader(mirrors)
+
+    downloader._download()
+
+    assert len(results) == 1
+    assert results[0][0] is False
+    assert not downloader.target_path.exists()
+
+
+def test_failed_range_stops_the_other_ranges(make_downloader, monkeypatch):
+    monkeypatch.setattr(updater, "DOWNLOAD_CHUNK_SIZE", 64 * 1024)
+    # The first range fails on every mirror; the others are served slowly
+    mirrors = Mirrors(failing_starts={0}, delay=0.05)
+    downloader, results = make_downloader(mirrors)
+
+    downloader._download()
+
+    # The ranges still in flight stop early and the download falls back to one mirror
+    assert results == [(True, "")]
+    assert downloader.target_path.read_bytes() == PAYLOAD
+    assert sum(mirrors.served) < len(PAYLOAD) // 2
+
+
+def test_cancel_does_not_fall_back_to_other_mirrors(make_downloader, monkeypatch):
+    mirrors = Mirrors()
+    downloader, results = make_downloader(mirrors)
+    handler = mirrors.__call__
+
+    def cancel_on_first_get(request):
+        if request.method == "GET":
+            downloader.cancel()
+        return handler(request)
+
+    transport = httpx.MockTransport(cancel_on_first_get)
+    downloader._client = httpx.Client(transport=transport)
+    monkeypatch.setattr(updater, "_create_range_client", lambda connections: httpx.Client(transport=transport))
+
+    downloader._download()
+
+    assert results == []
+    assert not mirrors.full_gets()
+    assert not downloader.target_path.exists()
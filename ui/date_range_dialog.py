@@ -2,7 +2,8 @@
 Dayflow - 日期范围选择对话框
 用于 Web Dashboard 导出功能
 """
-from datetime import date, timedelta
+from datetime import date
+from typing import Optional
 
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
@@ -19,6 +20,41 @@ class DateRangeDialog(QDialog):
     # 信号：选择完成后发出 (start_date, end_date)
     range_selected = Signal(date, date)
     
+    # 样式在各次打开对话框之间共享，不必每次重新构造
+    _SUBTLE_LABEL_QSS = "color: #888; font-size: 12px;"
+    _EXPORT_BTN_QSS = """
+        QPushButton {
+            background: qlineargradient(x1:0, y1:0, x2:1, y2:0, 
+                stop:0 #7c3aed, stop:1 #a78bfa);
+            color: white;
+            border: none;
+            border-radius: 6px;
+            padding: 8px 16px;
+            font-weight: bold;
+        }
+        QPushButton:hover {
+            background: qlineargradient(x1:0, y1:0, x2:1, y2:0, 
+                stop:0 #6d28d9, stop:1 #8b5cf6);
+        }
+    """
+    # 预设索引 -> 由今天计算 (开始, 结束)；不在表中的索引为自定义
+    _PRESETS = {
+        0: lambda t: (t, t),                                          # 今日
+        1: lambda t: (t.addDays(-1), t.addDays(-1)),                  # 昨日
+        2: lambda t: (t.addDays(1 - t.dayOfWeek()), t),               # 本周
+        3: lambda t: (t.addDays(-6 - t.dayOfWeek()), t.addDays(-t.dayOfWeek())),  # 上周
+        4: lambda t: (t.addDays(1 - t.day()), t),                     # 本月
+    }
+    # QFont 需要在 QApplication 创建后构造，首次使用时再创建
+    _title_font: Optional[QFont] = None
+    
+    @classmethod
+    def _get_title_font(cls) -> QFont:
+        """标题字体（首次调用时创建）"""
+        if cls._title_font is None:
+            cls._title_font = QFont("", 14, QFont.Bold)
+        return cls._title_font
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle(_("选择日期范围"))
@@ -39,7 +75,7 @@ class DateRangeDialog(QDialog):
         
         # 标题
         title = QLabel(_("📊 导出生产力报告"))
-        title.setFont(QFont("", 14, QFont.Bold))
+        title.setFont(self._get_title_font())
         title.setAlignment(Qt.AlignCenter)
         layout.addWidget(title)
         
@@ -72,7 +108,7 @@ class DateRangeDialog(QDialog):
         
         start_layout = QVBoxLayout()
         start_label = QLabel(_("开始日期"))
-        start_label.setStyleSheet("color: #888; font-size: 12px;")
+        start_label.setStyleSheet(self._SUBTLE_LABEL_QSS)
         self.start_date = QDateEdit()
         self.start_date.setCalendarPopup(True)
         self.start_date.setDate(QDate.currentDate())
@@ -82,7 +118,7 @@ class DateRangeDialog(QDialog):
         
         end_layout = QVBoxLayout()
         end_label = QLabel(_("结束日期"))
-        end_label.setStyleSheet("color: #888; font-size: 12px;")
+        end_label.setStyleSheet(self._SUBTLE_LABEL_QSS)
         self.end_date = QDateEdit()
         self.end_date.setCalendarPopup(True)
         self.end_date.setDate(QDate.currentDate())
@@ -107,21 +143,7 @@ class DateRangeDialog(QDialog):
         
         export_btn = QPushButton(_("导出报告"))
         export_btn.setMinimumWidth(100)
-        export_btn.setStyleSheet("""
-            QPushButton {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, 
-                    stop:0 #7c3aed, stop:1 #a78bfa);
-                color: white;
-                border: none;
-                border-radius: 6px;
-                padding: 8px 16px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, 
-                    stop:0 #6d28d9, stop:1 #8b5cf6);
-            }
-        """)
+        export_btn.setStyleSheet(self._EXPORT_BTN_QSS)
         export_btn.clicked.connect(self._on_export)
         
         btn_layout.addWidget(cancel_btn)
@@ -134,35 +156,23 @@ class DateRangeDialog(QDialog):
     
     def _on_preset_changed(self, index: int):
         """预设选项变化"""
-        today = date.today()
-        
-        if index == 0:  # 今日
-            start = end = today
-        elif index == 1:  # 昨日
-            start = end = today - timedelta(days=1)
-        elif index == 2:  # 本周
-            start = today - timedelta(days=today.weekday())
-            end = today
-        elif index == 3:  # 上周
-            start = today - timedelta(days=today.weekday() + 7)
-            end = start + timedelta(days=6)
-        elif index == 4:  # 本月
-            start = today.replace(day=1)
-            end = today
-        else:  # 自定义
+        preset = self._PRESETS.get(index)
+        if preset is None:  # 自定义
             # 不修改日期，让用户自己选择
             self.start_date.setEnabled(True)
             self.end_date.setEnabled(True)
             return
         
+        # 直接用 QDate 计算，避免 Python date 与 QDate 之间来回转换
+        start, end = preset(QDate.currentDate())
+        
         # 更新日期选择器
-        self.start_date.setDate(QDate(start.year, start.month, start.day))
-        self.end_date.setDate(QDate(end.year, end.month, end.day))
+        self.start_date.setDate(start)
+        self.end_date.setDate(end)
         
         # 非自定义模式下禁用日期选择器
-        is_custom = (index == 5)
-        self.start_date.setEnabled(is_custom)
-        self.end_date.setEnabled(is_custom)
+        self.start_date.setEnabled(False)
+        self.end_date.setEnabled(False)
     
     def _on_export(self):
         """导出按钮点击"""
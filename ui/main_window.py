@@ -1243,12 +1243,14 @@ class SettingsPanel(QWidget):
                 api_key=api_key,
                 model=api_model
             )
-            loop = asyncio.new_event_loop()
-            try:
-                success, message = loop.run_until_complete(provider.test_connection())
-            finally:
-                loop.run_until_complete(provider.close())
-                loop.close()
+            async def test_and_close():
+                # 测试与关闭客户端放在同一个协程中，只需运行一次事件循环
+                try:
+                    return await provider.test_connection()
+                finally:
+                    await provider.close()
+            
+            success, message = asyncio.run(test_and_close())
             
             # 回到主线程更新 UI
             from PySide6.QtCore import QMetaObject, Qt, Q_ARG
@@ -2573,6 +2575,11 @@ class MainWindow(QMainWindow):
         # 停止分析
         self._stop_analysis()
         
+        # 停止更新下载并关闭更新用的 HTTP 连接
+        if hasattr(self, 'update_manager'):
+            self.update_manager.cancel_download()
+            self.update_manager.close()
+        
         # 关闭数据库连接，确保数据写入
         if self.storage:
             self.storage.close()
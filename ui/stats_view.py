@@ -1736,19 +1736,20 @@ class StatsPanel(QWidget):
             prev_deep_work = 0
             prev_activities = 0
             
-            # 加载上周数据
-            for i in range(days + days - 1, days - 1, -1):
-                date = today - timedelta(days=i)
-                cards = self.storage.get_cards_for_date(date)
-                
-                for card in cards:
-                    prev_total_minutes += card.duration_minutes
-                    prev_activities += 1
-                    if card.productivity_score > 0:
-                        prev_total_score += card.productivity_score
-                        prev_score_count += 1
-                    if card.duration_minutes >= 60:
-                        prev_deep_work += 1
+            # 加载上周数据（单次范围查询）
+            day_start = today.replace(hour=0, minute=0, second=0, microsecond=0)
+            prev_cards = self.storage.get_cards_in_range(
+                day_start - timedelta(days=days + days - 1),
+                day_start - timedelta(days=days - 1)
+            )
+            for card in prev_cards:
+                prev_total_minutes += card.duration_minutes
+                prev_activities += 1
+                if card.productivity_score > 0:
+                    prev_total_score += card.productivity_score
+                    prev_score_count += 1
+                if card.duration_minutes >= 60:
+                    prev_deep_work += 1
             
             for i in range(days - 1, -1, -1):
                 date = today - timedelta(days=i)
@@ -70,6 +70,19 @@ def wait_for_process_exit(exe_path: Path, timeout: int = 30) -> bool:
     return False
 
 
+def install_file(src, dst):
+    """
+    安装单个文件到目标位置
+    
+    同一文件系统上创建硬链接（不复制数据，pending_update 保持完整以便重试），
+    跨文件系统或不支持硬链接时回退到 shutil.copy2
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
 def apply_update() -> bool:
     """执行更新"""
     app_data_dir = get_app_data_dir()
@@ -124,13 +137,13 @@ def apply_update() -> bool:
         if current_exe.exists():
             if backup_exe.exists():
                 backup_exe.unlink()
-            shutil.copy2(current_exe, backup_exe)
+            install_file(current_exe, backup_exe)
         
         # 替换 EXE
         logger.info("安装新版本 EXE...")
         if current_exe.exists():
             current_exe.unlink()
-        shutil.copy2(new_exe, current_exe)
+        install_file(new_exe, current_exe)
         
         # 复制其他文件（DLL、_internal 目录等）
         logger.info("复制依赖文件...")
@@ -149,12 +162,12 @@ def apply_update() -> bool:
                 logger.info(f"  复制文件: {item.name}")
                 if dest.exists():
                     dest.unlink()
-                shutil.copy2(item, dest)
+                install_file(item, dest)
             elif item.is_dir():
                 logger.info(f"  复制目录: {item.name}")
                 if dest.exists():
                     shutil.rmtree(dest)
-                shutil.copytree(item, dest)
+                shutil.copytree(item, dest, copy_function=install_file)
         
         # 清理待更新目录
         logger.info("清理临时文件...")